@@ -0,0 +1,225 @@
+"""
+Block-wise audio preprocessing with memory bounded by the block size
+"""
+import logging
+import wave
+
+import numpy as np
+from scipy import signal
+
+from filter_bank import get_sos
+
+logger = logging.getLogger(__name__)
+
+TARGET_SAMPLE_RATE = 16000
+HIGHPASS_CUTOFF = 80  # Hz, removes rumble and handling noise
+VOICE_BAND = (300, 3400)  # Hz, boosted to make speech stand out
+VOICE_BOOST = 0.3
+TARGET_PEAK = 0.8
+
+
+def decode_pcm_frames(frames, sample_width, channels):
+    """Convert raw WAV frames to mono float32 samples in [-1, 1)
+
+    Handles 8-bit (unsigned), 16, 24 and 32-bit PCM and averages channels.
+    """
+    if sample_width == 1:
+        samples = (np.frombuffer(frames, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 3:
+        # Widen packed 24-bit samples to int32 by adding a low zero byte
+        packed = np.frombuffer(frames, dtype=np.uint8).reshape(-1, 3)
+        widened = np.zeros((len(packed), 4), dtype=np.uint8)
+        widened[:, 1:] = packed
+        samples = widened.view('<i4').ravel().astype(np.float32) / 2147483648.0
+    elif sample_width in (2, 4):
+        dtype = np.int16 if sample_width == 2 else np.int32
+        samples = np.frombuffer(frames, dtype=dtype).astype(np.float32) / float(-np.iinfo(dtype).min)
+    else:
+        raise ValueError(f"Unsupported sample width: {sample_width} bytes")
+
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1, dtype=np.float32)
+    return samples
+
+
+def to_pcm16(samples):
+    """Clip float32 samples in [-1, 1) to 16-bit PCM"""
+    return np.clip(samples * np.float32(32768.0), -32768, 32767).astype(np.int16)
+
+
+class BlockResampler:
+    """Polyphase resampling of a signal that arrives in blocks
+
+    Every block is resampled together with enough already-seen input before
+    it and enough lookahead after it to cover the anti-aliasing filter, and
+    only the middle is kept (overlap-trim). Input offsets are kept on
+    multiples of the decimation factor, so the output matches resampling the
+    whole signal at once. Output lags the input by the lookahead until
+    flush() is called.
+    """
+
+    def __init__(self, source_rate, target_rate=TARGET_SAMPLE_RATE):
+        factor = np.gcd(int(source_rate), int(target_rate))
+        self.up = int(target_rate) // factor
+        self.down = int(source_rate) // factor
+        # resample_poly's filter reaches 10 * max(up, down) upsampled taps each way
+        reach = -(-10 * max(self.up, self.down) // self.up) + 1
+        self.context = -(-reach // self.down) * self.down
+        self._history = np.zeros(0, dtype=np.float32)
+        self._pending = np.zeros(0, dtype=np.float32)
+
+    @property
+    def passthrough(self):
+        return self.up == self.down
+
+    def _emit(self, count, final=False):
+        history_length = len(self._history)
+        stop = len(self._pending) if final else count + self.context
+        segment = np.concatenate((self._history, self._pending[:stop]))
+        resampled = signal.resample_poly(segment, self.up, self.down).astype(np.float32, copy=False)
+
+        start = history_length * self.up // self.down
+        output = resampled[start:start + -(-count * self.up // self.down)]
+
+        self._history = np.concatenate((self._history, self._pending[:count]))[-self.context:]
+        self._pending = self._pending[count:]
+        return output
+
+    def process(self, block):
+        """Resample the next block; returns whatever output is complete"""
+        if self.passthrough:
+            return block
+        self._pending = np.concatenate((self._pending, block))
+        ready = (len(self._pending) - self.context) // self.down * self.down
+        if ready <= 0:
+            return np.zeros(0, dtype=np.float32)
+        return self._emit(ready)
+
+    def flush(self):
+        """Resample the remaining input, treating the signal as ended"""
+        if self.passthrough or len(self._pending) == 0:
+            return np.zeros(0, dtype=np.float32)
+        return self._emit(len(self._pending), final=True)
+
+
+class BlockPreprocessor:
+    """Gain, 80 Hz high-pass, voice-band boost and noise gate for one stream
+
+    Filters are cached second-order sections run with sosfilt, and their
+    state is carried from block to block, so a signal processed in any
+    number of blocks gives the same output as one long pass. The filters
+    are causal, unlike the zero-phase filtfilt of whole-file processing;
+    the small phase shift does not matter for recognition.
+    """
+
+    def __init__(self, sample_rate=TARGET_SAMPLE_RATE, gain=1.0, noise_gate=0.0):
+        self.sample_rate = sample_rate
+        self.gain = np.float32(gain)
+        self.noise_gate = noise_gate
+        self.highpass = get_sos('highpass', 4, HIGHPASS_CUTOFF, sample_rate)
+        self.voice_band = get_sos('bandpass', 4, VOICE_BAND, sample_rate)
+        self._highpass_state = np.zeros((self.highpass.shape[0], 2))
+        self._voice_state = np.zeros((self.voice_band.shape[0], 2))
+
+    @classmethod
+    def from_calibrator(cls, calibrator, sample_rate=TARGET_SAMPLE_RATE, gain=1.0):
+        """Use the noise gate measured by microphone calibration, if any"""
+        noise_profile = getattr(calibrator, 'settings', {}).get('noise_profile')
+        noise_gate = noise_profile['rms'] * 2 if noise_profile else 0.0
+        return cls(sample_rate=sample_rate, gain=gain, noise_gate=noise_gate)
+
+    def process(self, block):
+        """Process the next block of float32 samples in [-1, 1)"""
+        block = np.asarray(block, dtype=np.float32) * self.gain
+        filtered, self._highpass_state = signal.sosfilt(self.highpass, block, zi=self._highpass_state)
+        voice, self._voice_state = signal.sosfilt(self.voice_band, filtered, zi=self._voice_state)
+        output = (filtered + VOICE_BOOST * voice).astype(np.float32)
+        if self.noise_gate:
+            output[np.abs(output) < self.noise_gate] = 0
+        return output
+
+    def process_pcm(self, samples):
+        """Process a block of 16-bit PCM samples and return 16-bit PCM"""
+        return to_pcm16(self.process(np.asarray(samples, dtype=np.float32) / np.float32(32768.0)))
+
+
+def preprocess_wav_blocks(input_file, output_file=None, calibrator=None, stats=None, block_seconds=10.0):
+    """Preprocess a WAV file block by block
+
+    A cheap first pass reads the file once to find the peak level; the
+    second pass down-mixes, resamples, normalizes and filters one block at
+    a time. Working memory depends on block_seconds, not on file length.
+    Returns 16-bit PCM bytes, or writes a WAV file and returns its path
+    when output_file is given.
+    """
+    with wave.open(input_file, 'rb') as wav_file:
+        channels = wav_file.getnchannels()
+        sample_width = wav_file.getsampwidth()
+        source_rate = wav_file.getframerate()
+        block_frames = max(1, int(source_rate * block_seconds))
+
+        # Pass 1: peak level only
+        peak = 0.0
+        while True:
+            frames = wav_file.readframes(block_frames)
+            if not frames:
+                break
+            samples = decode_pcm_frames(frames, sample_width, channels)
+            if len(samples):
+                peak = max(peak, float(np.max(np.abs(samples))))
+        wav_file.rewind()
+
+        resampler = BlockResampler(source_rate)
+        if calibrator is not None:
+            preprocessor = BlockPreprocessor.from_calibrator(calibrator, gain=TARGET_PEAK / peak if peak else 1.0)
+        else:
+            preprocessor = BlockPreprocessor(gain=TARGET_PEAK / peak if peak else 1.0)
+
+        output = bytearray()
+        writer = None
+        if output_file is not None:
+            writer = wave.open(output_file, 'wb')
+            writer.setnchannels(1)
+            writer.setsampwidth(2)
+            writer.setframerate(TARGET_SAMPLE_RATE)
+
+        # Pass 2: process and write one block at a time
+        source_bytes = 0
+        output_bytes = 0
+        try:
+            while True:
+                frames = wav_file.readframes(block_frames)
+                final = not frames
+                source_bytes += len(frames)
+                if final:
+                    resampled = resampler.flush()
+                else:
+                    resampled = resampler.process(decode_pcm_frames(frames, sample_width, channels))
+
+                if len(resampled):
+                    pcm = to_pcm16(preprocessor.process(resampled)).tobytes()
+                    output_bytes += len(pcm)
+                    if writer is not None:
+                        writer.writeframes(pcm)
+                    else:
+                        output.extend(pcm)
+                if final:
+                    break
+        finally:
+            if writer is not None:
+                writer.close()
+
+    logger.info(
+        f"Preprocessed {channels}ch {source_rate} Hz audio in {block_seconds}s blocks: "
+        f"{source_bytes} -> {output_bytes} bytes"
+    )
+    if stats is not None:
+        stats.update({
+            'source_sample_rate': source_rate,
+            'source_channels': channels,
+            'source_bytes': source_bytes,
+            'output_bytes': output_bytes,
+            'bytes_saved': source_bytes - output_bytes,
+            'block_seconds': block_seconds
+        })
+    return output_file if output_file is not None else bytes(output)
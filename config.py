@@ -14,6 +14,63 @@ class Config:
     UPLOAD_FOLDER = 'uploads'
     RESULTS_FOLDER = 'results'
     
+    # Real-time transcription worker pool (shared by all streaming sessions)
+    STREAMING_WORKERS = int(os.environ.get('STREAMING_WORKERS', 4))
+    STREAMING_MAX_INFLIGHT_PER_SESSION = int(os.environ.get('STREAMING_MAX_INFLIGHT_PER_SESSION', 2))
+    
+    # Per-session audio ingest queue and backlog policy: block, drop_oldest or coalesce
+    STREAMING_QUEUE_SIZE = int(os.environ.get('STREAMING_QUEUE_SIZE', 40))
+    STREAMING_QUEUE_POLICY = os.environ.get('STREAMING_QUEUE_POLICY', 'coalesce')
+    STREAMING_QUEUE_BLOCK_TIMEOUT = float(os.environ.get('STREAMING_QUEUE_BLOCK_TIMEOUT', 0.5))
+    STREAMING_QUEUE_MAX_KB = int(os.environ.get('STREAMING_QUEUE_MAX_KB', 256))  # Decoded right away beyond this
+    
+    # Recognition backends: google_web, google_cloud or fake (offline, for load tests)
+    RECOGNIZER_BACKEND = os.environ.get('RECOGNIZER_BACKEND', 'google_web')  # Streaming and quick uploads
+    BATCH_RECOGNIZER_BACKEND = os.environ.get(
+        'BATCH_RECOGNIZER_BACKEND', 'fake' if RECOGNIZER_BACKEND == 'fake' else 'google_cloud')
+    FAKE_RECOGNIZER_LATENCY = float(os.environ.get('FAKE_RECOGNIZER_LATENCY', 0.3))
+    FAKE_RECOGNIZER_JITTER = float(os.environ.get('FAKE_RECOGNIZER_JITTER', 0.1))
+    FAKE_RECOGNIZER_LATENCY_PER_SECOND = float(os.environ.get('FAKE_RECOGNIZER_LATENCY_PER_SECOND', 0.0))
+    FAKE_RECOGNIZER_ERROR_RATE = float(os.environ.get('FAKE_RECOGNIZER_ERROR_RATE', 0.0))
+    FAKE_RECOGNIZER_NO_SPEECH_RATE = float(os.environ.get('FAKE_RECOGNIZER_NO_SPEECH_RATE', 0.0))
+    FAKE_RECOGNIZER_SEED = int(os.environ.get('FAKE_RECOGNIZER_SEED', 0))
+    FAKE_RECOGNIZER_TRANSCRIPTS = os.environ.get('FAKE_RECOGNIZER_TRANSCRIPTS')  # One transcript per line
+    
+    # Uploaded recordings are cut at pauses and the segments recognized in parallel
+    TRANSCRIBE_SEGMENT_SECONDS = int(os.environ.get('TRANSCRIBE_SEGMENT_SECONDS', 55))
+    TRANSCRIBE_PARALLELISM = int(os.environ.get('TRANSCRIBE_PARALLELISM', 4))
+    SPEECH_CLIENT_POOL_SIZE = int(os.environ.get('SPEECH_CLIENT_POOL_SIZE', 4))  # Reused Cloud Speech connections
+    PREPROCESS_BLOCK_SECONDS = float(os.environ.get('PREPROCESS_BLOCK_SECONDS', 0))  # >0 streams uploads in blocks through causal filters
+    
+    # Durable upload transcription queue (SQLite, shared by all server processes)
+    JOB_DB_PATH = os.environ.get('JOB_DB_PATH', 'jobs.db')
+    JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 2))  # Concurrent jobs per process
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 3))
+    JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS', 300))  # Jobs of a dead worker are requeued after this
+    JOB_RETRY_DELAY = int(os.environ.get('JOB_RETRY_DELAY', 10))
+    JOB_STATUS_MAX_WAIT = float(os.environ.get('JOB_STATUS_MAX_WAIT', 30))  # Longest /status?wait= long-poll
+    
+    # Transcription results cached by audio content and recognition options
+    RESULT_CACHE_DIR = os.environ.get('RESULT_CACHE_DIR', os.path.join('cache', 'results'))
+    RESULT_CACHE_TTL_HOURS = float(os.environ.get('RESULT_CACHE_TTL_HOURS', 168))
+    RESULT_CACHE_MAX_ENTRIES = int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', 5000))
+    RESULT_CACHE_MAX_MB = int(os.environ.get('RESULT_CACHE_MAX_MB', 200))
+    
+    # Phrase usage counts are written behind, not on every correction
+    PHRASE_FLUSH_UPDATES = int(os.environ.get('PHRASE_FLUSH_UPDATES', 100))
+    PHRASE_FLUSH_SECONDS = float(os.environ.get('PHRASE_FLUSH_SECONDS', 30))
+    PHRASE_LOOKUP = os.environ.get('PHRASE_LOOKUP', 'symspell')  # symspell, buckets or linear
+    
+    # Background cleanup of finished jobs, idle sessions and old files
+    JANITOR_INTERVAL = int(os.environ.get('JANITOR_INTERVAL', 300))  # Seconds between sweeps
+    JOB_RETENTION_HOURS = float(os.environ.get('JOB_RETENTION_HOURS', 72))  # Finished jobs, then /status returns 404
+    JOB_MAX_FINISHED = int(os.environ.get('JOB_MAX_FINISHED', 10000))
+    STREAMING_IDLE_TIMEOUT = int(os.environ.get('STREAMING_IDLE_TIMEOUT', 600))  # Seconds without audio
+    RESULTS_TTL_HOURS = float(os.environ.get('RESULTS_TTL_HOURS', 72))  # Downloadable transcript files
+    RESULTS_MAX_FILES = int(os.environ.get('RESULTS_MAX_FILES', 5000))
+    RESULTS_MAX_MB = int(os.environ.get('RESULTS_MAX_MB', 500))
+    EXPORT_TTL_MINUTES = float(os.environ.get('EXPORT_TTL_MINUTES', 60))  # Temporary export files
+    
     # Session settings
     PERMANENT_SESSION_LIFETIME = timedelta(days=30)
     
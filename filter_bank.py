@@ -0,0 +1,33 @@
+"""
+Shared cache of designed audio filters
+"""
+import functools
+
+from scipy import signal
+
+_BTYPE_ALIASES = {
+    'low': 'lowpass',
+    'high': 'highpass',
+    'band': 'bandpass',
+    'stop': 'bandstop'
+}
+
+
+@functools.lru_cache(maxsize=64)
+def _design_sos(btype, order, cutoffs, sample_rate):
+    return signal.butter(order, cutoffs, btype=btype, fs=sample_rate, output='sos')
+
+
+def get_sos(btype, order, cutoffs, sample_rate):
+    """Butterworth filter as second-order sections, designed once per setting
+
+    btype accepts scipy's names ('highpass' or 'high', ...); cutoffs is one
+    frequency in Hz or a (low, high) pair for band filters. The returned
+    array is shared between callers and must not be modified.
+    """
+    btype = _BTYPE_ALIASES.get(btype, btype)
+    if isinstance(cutoffs, (list, tuple)):
+        cutoffs = tuple(float(cutoff) for cutoff in cutoffs)
+    else:
+        cutoffs = float(cutoffs)
+    return _design_sos(btype, int(order), cutoffs, float(sample_rate))
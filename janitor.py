@@ -0,0 +1,165 @@
+"""
+Background cleanup of long-lived in-memory and on-disk stores
+"""
+import logging
+import os
+import shutil
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def prune_directory(directory, max_age_seconds=None, max_entries=None, max_bytes=None, prefix='', keep=()):
+    """Remove old entries from a directory; returns how many were removed
+
+    Entries (files or whole subdirectories) whose name starts with prefix
+    are removed once they are older than max_age_seconds; after that the
+    oldest ones go until at most max_entries / max_bytes remain. Paths in
+    keep are never removed and do not count towards the limits.
+    """
+    keep = {os.path.abspath(path) for path in keep}
+    entries = []
+    try:
+        with os.scandir(directory) as scan:
+            for entry in scan:
+                if not entry.name.startswith(prefix) or os.path.abspath(entry.path) in keep:
+                    continue
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                    size = _tree_size(entry.path) if entry.is_dir(follow_symlinks=False) else stat.st_size
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, size, entry.path))
+    except FileNotFoundError:
+        return 0
+
+    now = time.time()
+    entries.sort()
+    total_bytes = sum(size for _, size, _ in entries)
+    count = len(entries)
+    removed = 0
+    for mtime, size, path in entries:
+        expired = max_age_seconds is not None and now - mtime > max_age_seconds
+        over_count = max_entries is not None and count > max_entries
+        over_bytes = max_bytes is not None and total_bytes > max_bytes
+        if not (expired or over_count or over_bytes):
+            break
+        if _remove(path):
+            removed += 1
+            count -= 1
+            total_bytes -= size
+    return removed
+
+
+def directory_size(directory, prefix=''):
+    """Number of entries and total bytes in a directory"""
+    count = 0
+    total_bytes = 0
+    try:
+        with os.scandir(directory) as scan:
+            for entry in scan:
+                if not entry.name.startswith(prefix):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        total_bytes += _tree_size(entry.path)
+                    else:
+                        total_bytes += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+                count += 1
+    except FileNotFoundError:
+        pass
+    return {'entries': count, 'bytes': total_bytes}
+
+
+def _tree_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def _remove(path):
+    try:
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path)
+        else:
+            os.remove(path)
+        return True
+    except OSError as e:
+        logger.warning(f"Failed to remove {path}: {e}")
+        return False
+
+
+class Janitor:
+    """One daemon thread that sweeps registered stores every interval seconds
+
+    Each task has a sweep() that removes expired entries and returns how
+    many it removed, and an optional gauge() reporting the store's current
+    size. A failing task is logged and does not stop the others.
+    """
+
+    def __init__(self, interval=300):
+        self.interval = interval
+        self._tasks = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, name, sweep, gauge=None):
+        with self._lock:
+            self._tasks[name] = {'sweep': sweep, 'gauge': gauge, 'removed': 0, 'last_run': None}
+
+    def start(self):
+        """Start the sweeping thread once per process"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='janitor')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.sweep()
+
+    def sweep(self):
+        """Run every task once; returns the number of entries each removed"""
+        with self._lock:
+            tasks = list(self._tasks.items())
+
+        removed = {}
+        for name, task in tasks:
+            try:
+                removed[name] = task['sweep']() or 0
+            except Exception as e:
+                logger.error(f"Janitor task {name} failed: {e}")
+                continue
+            with self._lock:
+                task['removed'] += removed[name]
+                task['last_run'] = time.time()
+            if removed[name]:
+                logger.info(f"Janitor removed {removed[name]} entries from {name}")
+        return removed
+
+    def stats(self):
+        with self._lock:
+            tasks = list(self._tasks.items())
+
+        stats = {}
+        for name, task in tasks:
+            stats[name] = {'removed': task['removed'], 'last_run': task['last_run']}
+            if task['gauge'] is not None:
+                try:
+                    gauge = task['gauge']()
+                except Exception as e:
+                    logger.warning(f"Janitor gauge {name} failed: {e}")
+                    continue
+                stats[name].update(gauge if isinstance(gauge, dict) else {'size': gauge})
+        return stats
@@ -0,0 +1,345 @@
+"""
+Durable transcription job queue backed by SQLite
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+QUEUED = 'queued'
+PROCESSING = 'processing'
+COMPLETED = 'completed'
+ERROR = 'error'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    progress INTEGER NOT NULL DEFAULT 0,
+    message TEXT,
+    version INTEGER NOT NULL DEFAULT 0,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    payload TEXT,
+    result TEXT,
+    result_path TEXT,
+    result_filename TEXT,
+    error TEXT,
+    error_details TEXT,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    updated_at REAL NOT NULL,
+    completed_at REAL,
+    available_at REAL NOT NULL,
+    lease_expires REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, available_at, created_at);
+"""
+
+_UPDATABLE = {
+    'status', 'progress', 'message', 'result', 'result_path', 'result_filename',
+    'error', 'error_details', 'completed_at', 'available_at', 'lease_expires'
+}
+
+
+class JobFailed(Exception):
+    """A job failed in a way that retrying cannot fix"""
+
+    def __init__(self, error, details=None):
+        super().__init__(error)
+        self.error = error
+        self.details = details
+
+
+class JobStore:
+    """Transcription jobs in an SQLite database, shared by every process
+
+    The database runs in WAL mode so status reads never wait for workers
+    writing progress. Every write bumps the job's version. A job being
+    processed holds a lease that its worker keeps extending; jobs whose
+    lease ran out (their process died) go back to the queue.
+
+    on_change(job_id) is called after every change made through this
+    store, e.g. to push progress to clients.
+    """
+
+    def __init__(self, path, on_change=None):
+        self.path = path
+        self.on_change = on_change
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript(_SCHEMA)
+
+    def _connection(self):
+        """One connection per thread, in autocommit mode"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _to_job(row):
+        if row is None:
+            return None
+        job = dict(row)
+        for field in ('payload', 'result'):
+            if job[field] is not None:
+                job[field] = json.loads(job[field])
+        return job
+
+    def create(self, payload, job_id=None, status=QUEUED, lease_seconds=300):
+        """Add a new job and return its id
+
+        Jobs created as PROCESSING are not claimed by workers; the caller
+        finishes them itself (e.g. from a cached result). They hold a lease
+        of lease_seconds like a claimed job, so if the caller never finishes
+        the job it goes back to the queue and a worker runs it.
+        """
+        job_id = job_id or str(uuid.uuid4())
+        now = time.time()
+        queued = status == QUEUED
+        self._connection().execute(
+            'INSERT INTO jobs (id, status, message, payload, created_at, started_at, updated_at, available_at, '
+            'lease_expires) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (job_id, status, 'Waiting for a worker' if queued else None, json.dumps(payload),
+             now, None if queued else now, now, now, None if queued else now + lease_seconds)
+        )
+        return job_id
+
+    def get(self, job_id):
+        row = self._connection().execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return self._to_job(row)
+
+    def _changed(self, job_id):
+        if self.on_change is None:
+            return
+        try:
+            self.on_change(job_id)
+        except Exception as e:
+            logger.warning(f"Job change listener failed for {job_id}: {e}")
+
+    def update(self, job_id, **fields):
+        """Update job columns (result is stored as JSON) and bump the version"""
+        unknown = set(fields) - _UPDATABLE
+        if unknown:
+            raise ValueError(f"Cannot update job fields: {', '.join(sorted(unknown))}")
+        if 'result' in fields and fields['result'] is not None:
+            fields['result'] = json.dumps(fields['result'])
+
+        assignments = ', '.join(f'{name} = ?' for name in fields)
+        if assignments:
+            assignments += ', '
+        cursor = self._connection().execute(
+            f'UPDATE jobs SET {assignments}version = version + 1, updated_at = ? WHERE id = ?',
+            (*fields.values(), time.time(), job_id)
+        )
+        if cursor.rowcount:
+            self._changed(job_id)
+        return cursor.rowcount > 0
+
+    def claim(self, worker, lease_seconds):
+        """Atomically move the oldest runnable job to processing; None if idle"""
+        conn = self._connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT id FROM jobs WHERE status = ? AND available_at <= ? ORDER BY created_at LIMIT 1',
+                (QUEUED, now)
+            ).fetchone()
+            if row is None:
+                conn.execute('COMMIT')
+                return None
+            conn.execute(
+                'UPDATE jobs SET status = ?, attempts = attempts + 1, worker = ?, started_at = ?, '
+                'lease_expires = ?, message = ?, version = version + 1, updated_at = ? WHERE id = ?',
+                (PROCESSING, worker, now, now + lease_seconds, 'Processing started', now, row['id'])
+            )
+            job = conn.execute('SELECT * FROM jobs WHERE id = ?', (row['id'],)).fetchone()
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self._changed(job['id'])
+        return self._to_job(job)
+
+    def extend_leases(self, job_ids, lease_seconds):
+        """Keep the leases of running jobs alive"""
+        if not job_ids:
+            return
+        placeholders = ', '.join('?' for _ in job_ids)
+        self._connection().execute(
+            f'UPDATE jobs SET lease_expires = ? WHERE status = ? AND id IN ({placeholders})',
+            (time.time() + lease_seconds, PROCESSING, *job_ids)
+        )
+
+    def requeue_stale(self):
+        """Return jobs whose worker stopped renewing its lease to the queue"""
+        now = time.time()
+        cursor = self._connection().execute(
+            'UPDATE jobs SET status = ?, available_at = ?, lease_expires = NULL, '
+            'message = ?, version = version + 1, updated_at = ? '
+            'WHERE status = ? AND lease_expires < ?',
+            (QUEUED, now, 'Requeued after worker stopped', now, PROCESSING, now)
+        )
+        return cursor.rowcount
+
+    def prune(self, max_age_seconds=None, max_finished=None):
+        """Delete finished jobs older than max_age_seconds, then the oldest beyond max_finished"""
+        conn = self._connection()
+        removed = 0
+        if max_age_seconds is not None:
+            removed += conn.execute(
+                'DELETE FROM jobs WHERE status IN (?, ?) AND completed_at < ?',
+                (COMPLETED, ERROR, time.time() - max_age_seconds)
+            ).rowcount
+        if max_finished is not None:
+            removed += conn.execute(
+                'DELETE FROM jobs WHERE id IN (SELECT id FROM jobs WHERE status IN (?, ?) '
+                'ORDER BY completed_at DESC LIMIT -1 OFFSET ?)',
+                (COMPLETED, ERROR, max_finished)
+            ).rowcount
+        return removed
+
+    def result_paths(self):
+        """Result files of every job still stored"""
+        rows = self._connection().execute('SELECT result_path FROM jobs WHERE result_path IS NOT NULL')
+        return {row['result_path'] for row in rows}
+
+    def counts(self):
+        """Number of jobs in each status"""
+        rows = self._connection().execute('SELECT status, COUNT(*) AS count FROM jobs GROUP BY status')
+        return {row['status']: row['count'] for row in rows}
+
+
+class JobWorkerPool:
+    """Fixed number of worker threads that run jobs from a JobStore
+
+    handler(job) does the work and reports completion itself; raising
+    JobFailed fails the job for good, and any other exception retries it
+    after retry_delay seconds until max_attempts is reached. cleanup(job)
+    runs once a job reaches a final state. Claims are atomic in the
+    database, so pools in several processes can share one store.
+    """
+
+    def __init__(self, store, handler, num_workers=2, max_attempts=3, lease_seconds=300,
+                 retry_delay=10, poll_interval=1.0, cleanup=None):
+        self.store = store
+        self.handler = handler
+        self.num_workers = num_workers
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self.cleanup = cleanup
+
+        self._wakeup = threading.Condition()
+        self._running = set()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._name = f'{os.getpid()}-{uuid.uuid4().hex[:6]}'
+
+    def start(self):
+        """Start the workers once per process; requeues jobs orphaned by a restart"""
+        with self._lock:
+            if self._threads:
+                return
+            requeued = self.store.requeue_stale()
+            if requeued:
+                logger.info(f"Requeued {requeued} interrupted transcription jobs")
+
+            for i in range(self.num_workers):
+                worker = threading.Thread(target=self._worker, args=(f'{self._name}-{i}',),
+                                          name=f'job-worker-{i}')
+                worker.daemon = True
+                worker.start()
+                self._threads.append(worker)
+
+            keeper = threading.Thread(target=self._keep_leases, name='job-lease-keeper')
+            keeper.daemon = True
+            keeper.start()
+            self._threads.append(keeper)
+
+    def submit(self, payload, job_id=None):
+        """Queue a job and wake an idle worker"""
+        job_id = self.store.create(payload, job_id)
+        self.start()
+        with self._wakeup:
+            self._wakeup.notify()
+        return job_id
+
+    def _keep_leases(self):
+        while True:
+            time.sleep(self.lease_seconds / 3)
+            try:
+                with self._lock:
+                    running = list(self._running)
+                self.store.extend_leases(running, self.lease_seconds)
+                self.store.requeue_stale()
+            except Exception as e:
+                logger.error(f"Failed to renew job leases: {e}")
+
+    def _worker(self, name):
+        while True:
+            try:
+                job = self.store.claim(name, self.lease_seconds)
+            except Exception as e:
+                logger.error(f"Failed to claim a job: {e}")
+                job = None
+
+            if job is None:
+                with self._wakeup:
+                    self._wakeup.wait(timeout=self.poll_interval)
+                continue
+
+            with self._lock:
+                self._running.add(job['id'])
+            try:
+                self._run(job)
+            finally:
+                with self._lock:
+                    self._running.discard(job['id'])
+
+    def _run(self, job):
+        job_id = job['id']
+        try:
+            self.handler(job)
+            final = True
+        except JobFailed as e:
+            logger.error(f"Job {job_id} failed: {e.error}")
+            self.store.update(job_id, status=ERROR, error=e.error, error_details=e.details,
+                              completed_at=time.time(), lease_expires=None)
+            final = True
+        except Exception as e:
+            final = job['attempts'] >= self.max_attempts
+            logger.error(f"Job {job_id} attempt {job['attempts']} failed: {e}")
+            if final:
+                self.store.update(job_id, status=ERROR, error=str(e),
+                                  error_details=f"Error type: {type(e).__name__}",
+                                  completed_at=time.time(), lease_expires=None)
+            else:
+                self.store.update(job_id, status=QUEUED, progress=0, lease_expires=None,
+                                  message=f"Retrying after error: {e}",
+                                  available_at=time.time() + self.retry_delay)
+
+        if final and self.cleanup is not None:
+            try:
+                self.cleanup(self.store.get(job_id))
+            except Exception as e:
+                logger.warning(f"Cleanup failed for job {job_id}: {e}")
+
+    def stats(self):
+        with self._lock:
+            running = len(self._running)
+        return dict(self.store.counts(), workers=self.num_workers, running_here=running)
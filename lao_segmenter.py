@@ -0,0 +1,88 @@
+"""
+Syllable segmentation of Lao text, which is written without spaces between words
+"""
+import re
+
+CONSONANTS = 'ກ-ຮໜ-ໟ'  # ກ-ຮ, ໜ ໝ and the Khmu letters
+LEADING_VOWELS = 'ເ-ໄ'  # ເ ແ ໂ ໃ ໄ, written before the consonant
+VOWEL_MARKS = 'ັິ-ຼໍ'  # Vowels above/below the consonant
+TONE_MARKS = '່-໌'  # Tone marks and the cancellation mark
+FOLLOWING_VOWELS = 'ະາຳຽ'  # ະ າ ຳ ຽ
+REPEAT_MARK = 'ໆ'  # ໆ, repeats the preceding word
+DIGITS = '໐-໙'
+LAO = '\u0e80-\u0eff'  # The Lao Unicode block
+
+# Runs of Lao script and of anything else that is not whitespace
+_RUN_PATTERN = re.compile(f'[{LAO}]+|[^\\s{LAO}]+')
+_LAO_PATTERN = re.compile(f'[{LAO}]')
+
+# Smallest units that can never be split: an optional leading vowel, the
+# consonant (ຫ + sonorant counts as one), its marks and following vowels
+_ONSET = f'(?:ຫ[ງຍນມລວ]|[{CONSONANTS}])'
+_MARKS = f'[{VOWEL_MARKS}{TONE_MARKS}]*'
+_CLUSTER_PATTERN = re.compile(
+    f'[{LEADING_VOWELS}]?{_ONSET}{_MARKS}(?:[{FOLLOWING_VOWELS}]{_MARKS})*{REPEAT_MARK}?'
+    f'|[{DIGITS}]+|[{LAO}]'
+)
+_BARE_PATTERN = re.compile(f'{_ONSET}{REPEAT_MARK}?')
+_VOWEL_PATTERN = re.compile(f'[{LEADING_VOWELS}{VOWEL_MARKS}{FOLLOWING_VOWELS}]')
+_TRAILING_MARKS = re.compile(f'[{TONE_MARKS}{REPEAT_MARK}]+$')
+
+_VOWEL_CONSONANTS = 'ອວ'  # Also write vowels after a consonant
+_OPEN_ENDINGS = ('ະ', 'ຳ', 'ົາ')  # Vowels that end a syllable
+
+
+def _lao_syllables(run, offset):
+    """Group a run of Lao script into syllable spans
+
+    Clusters are joined by spelling rules: a bare ອ or ວ after a consonant
+    without a vowel is that syllable's vowel (ວ with a vowel of its own
+    makes an onset like ຄວ), ອ/ຍ after ເ◌ື or ເ◌ີ complete the vowel, and
+    one bare consonant after a vowel is the final consonant unless the
+    vowel ends the syllable (ະ, ຳ, ເ◌ົາ, ໃ, ໄ) or the consonant starts a
+    syllable that uses ອ/ວ as its vowel.
+    """
+    clusters = [match.span() for match in _CLUSTER_PATTERN.finditer(run)]
+    bare = [bool(_BARE_PATTERN.fullmatch(run[start:end])) for start, end in clusters]
+
+    spans = []
+    syllable = None  # [start, end, has_vowel, has_final]
+    for i, (start, end) in enumerate(clusters):
+        cluster = run[start:end]
+        if syllable is not None and not syllable[3]:
+            text = _TRAILING_MARKS.sub('', run[syllable[0]:syllable[1]])
+            if not syllable[2] and cluster[0] in _VOWEL_CONSONANTS:
+                syllable[1], syllable[2] = end, True
+                continue
+            if bare[i]:
+                next_is_vowel = i + 1 < len(clusters) and bare[i + 1] and run[clusters[i + 1][0]] in _VOWEL_CONSONANTS
+                if text[0] == 'ເ' and text[-1] in 'ີື' and cluster[0] in 'ອຍ':
+                    syllable[1] = end
+                    continue
+                open_ending = text.endswith(_OPEN_ENDINGS) or text[0] in 'ໃໄ'
+                if syllable[2] and not open_ending and not next_is_vowel:
+                    syllable[1], syllable[3] = end, True
+                    continue
+
+        if syllable is not None:
+            spans.append((offset + syllable[0], offset + syllable[1]))
+        syllable = [start, end, bool(_VOWEL_PATTERN.search(cluster)), False]
+
+    if syllable is not None:
+        spans.append((offset + syllable[0], offset + syllable[1]))
+    return spans
+
+
+def syllable_spans(text):
+    """(start, end) offsets of the tokens in text
+
+    Lao script is split into syllables; everything else is split on
+    whitespace and at the edges of Lao runs. Costs one pass over the text.
+    """
+    spans = []
+    for match in _RUN_PATTERN.finditer(text):
+        if _LAO_PATTERN.match(match.group()):
+            spans.extend(_lao_syllables(match.group(), match.start()))
+        else:
+            spans.append(match.span())
+    return spans
@@ -5,6 +5,7 @@ import os
 from scipy import signal
 import logging
 from datetime import datetime
+from filter_bank import get_sos
 
 logger = logging.getLogger(__name__)
 
@@ -173,10 +174,9 @@ class MicrophoneCalibrator:
         
         # Apply high-pass filter to remove low frequency noise
         nyquist = self.RATE / 2
-        cutoff = 80 / nyquist
-        if cutoff < 1.0:
-            b, a = signal.butter(4, cutoff, btype='high')
-            audio_data = signal.filtfilt(b, a, audio_data)
+        if 80 < nyquist:
+            sos = get_sos('highpass', 4, 80, self.RATE)
+            audio_data = signal.sosfiltfilt(sos, audio_data)
         
         return audio_data
     
@@ -1,16 +1,162 @@
+import atexit
 import json
 import os
+import threading
 from typing import Dict, List, Optional, Tuple
 import logging
+import random
+import tempfile
+import time
 from datetime import datetime
 from Levenshtein import distance
 from symspellpy import SymSpell, Verbosity
 
+from lao_segmenter import syllable_spans
+
 logger = logging.getLogger(__name__)
 
+MAX_EDIT_DISTANCE = 2  # Fuzzy lookups find entries within this many edits
+_ENTRY = None  # Trie node key holding the (order, phrase) that ends there
+
+def token_spans(text: str) -> List[Tuple[int, int]]:
+    """(start, end) offsets of the matching units in text: words, or syllables of Lao script"""
+    return syllable_spans(text)
+
+class LinearTermIndex:
+    """Compares the query with every term; the baseline for the other indexes"""
+    
+    def __init__(self):
+        self.terms = []
+    
+    def add(self, term: str):
+        self.terms.append(term)
+    
+    def lookup(self, query: str, max_distance: int) -> List[Tuple[str, int]]:
+        """(term, distance) for every term within max_distance edits"""
+        matches = []
+        for term in self.terms:
+            dist = distance(query, term, score_cutoff=max_distance)
+            if dist <= max_distance:
+                matches.append((term, dist))
+        return matches
+
+class SymSpellTermIndex:
+    """SymSpell delete index: lookup cost does not grow with the number of terms
+    
+    Distances are optimal string alignment, so a transposition counts as
+    one edit.
+    """
+    
+    def __init__(self):
+        self.sym_spell = SymSpell(max_dictionary_edit_distance=MAX_EDIT_DISTANCE, prefix_length=7)
+    
+    def add(self, term: str):
+        self.sym_spell.create_dictionary_entry(term, 1)
+    
+    def lookup(self, query: str, max_distance: int) -> List[Tuple[str, int]]:
+        return [(suggestion.term, suggestion.distance)
+                for suggestion in self.sym_spell.lookup(query, Verbosity.ALL, max_edit_distance=max_distance)]
+
+class LengthBucketIndex:
+    """Terms grouped by length, compared with a bounded distance
+    
+    Terms whose length differs from the query's by more than max_distance
+    can never be close enough, so only the buckets around the query's
+    length are scanned, and each comparison stops as soon as the distance
+    is known to exceed max_distance.
+    """
+    
+    def __init__(self):
+        self.buckets = {}  # Length -> terms
+    
+    def add(self, term: str):
+        self.buckets.setdefault(len(term), []).append(term)
+    
+    def lookup(self, query: str, max_distance: int) -> List[Tuple[str, int]]:
+        matches = []
+        for length in range(len(query) - max_distance, len(query) + max_distance + 1):
+            for term in self.buckets.get(length, ()):
+                dist = distance(query, term, score_cutoff=max_distance)
+                if dist <= max_distance:
+                    matches.append((term, dist))
+        return matches
+
+TERM_INDEXES = {
+    'linear': LinearTermIndex,
+    'symspell': SymSpellTermIndex,
+    'buckets': LengthBucketIndex
+}
+
+class PhraseIndex:
+    """Fuzzy lookup structures over a set of phrases and their alternatives
+    
+    Every term (a phrase or one of its alternatives, lowercased) goes into a
+    term index and, token by token, into a trie whose tokens have a term
+    index of their own. `lookup` picks the kind of term index (see
+    TERM_INDEXES). Terms can only be added; removing one means building a
+    new index.
+    """
+    
+    def __init__(self, lookup: str = 'symspell'):
+        if lookup not in TERM_INDEXES:
+            raise ValueError(f"Unknown phrase lookup: {lookup}")
+        self.terms = TERM_INDEXES[lookup]()
+        self.token_index = TERM_INDEXES[lookup]()
+        self.owners = {}  # Term -> [(order, category, phrase)] it stands for
+        self.trie = {}
+        self._tokens = set()
+        self._next_order = 0  # Ties between equally good matches go to the lowest order
+    
+    def add(self, category: str, phrase: str, alternatives: List[str]):
+        for term in [phrase, *alternatives]:
+            term = term.lower()
+            spans = token_spans(term)
+            if not spans:
+                continue
+            order = self._next_order
+            self._next_order += 1
+            
+            if term not in self.owners:
+                self.owners[term] = []
+                self.terms.add(term)
+            self.owners[term].append((order, category, phrase))
+            
+            node = self.trie
+            for start, end in spans:
+                token = term[start:end]
+                if token not in self._tokens:
+                    self._tokens.add(token)
+                    self.token_index.add(token)
+                node = node.setdefault(token, {})
+            node.setdefault(_ENTRY, (order, phrase))
+
 class PhraseDictionary:
-    def __init__(self, dictionary_file: str = "phrase_dictionary.json"):
+    """Domain phrases with alternative spellings, used to correct transcripts
+
+    Phrases and their alternatives are indexed (lowercased) for fuzzy
+    lookup. `lookup` selects the index: 'symspell' (default; lookup cost
+    does not grow with the dictionary, but its delete index uses more
+    memory), 'buckets' (compares only entries of a possible length) or
+    'linear' (compares every entry, for benchmarks). Multi-word entries
+    are also stored in a token trie, which correct_text walks with fuzzy
+    token matches to find the longest phrase starting at each word. New
+    phrases are added to the live index; replacing or removing one
+    rebuilds it.
+
+    Usage counts are kept in memory and written behind: after flush_every
+    updates or flush_interval seconds, whichever comes first, and when the
+    process exits.
+    """
+
+    def __init__(self, dictionary_file: str = "phrase_dictionary.json",
+                 flush_every: int = 100, flush_interval: float = 30.0, lookup: str = 'symspell'):
         self.dictionary_file = dictionary_file
+        self.lookup = lookup
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._lock = threading.RLock()
+        self._pending_updates = 0
+        self._flush_timer = None
         self.categories = {
             "general": {},
             "technical": {},
@@ -18,8 +164,9 @@ class PhraseDictionary:
             "acronyms": {}
         }
         self.frequency = {}
-        self.sym_spell = SymSpell(max_dictionary_edit_distance=2, prefix_length=7)
+        self.index = PhraseIndex(lookup)
         self.load_dictionary()
+        atexit.register(self.flush)
         
     def load_dictionary(self):
         """Load the dictionary from file if it exists"""
@@ -31,72 +178,107 @@ class PhraseDictionary:
                     self.frequency = data.get('frequency', {})
             except Exception as e:
                 logger.error(f"Error loading dictionary: {str(e)}")
+        self._build_index()
+    
+    def _build_index(self):
+        """Index every phrase and alternative for fuzzy lookup
+        
+        A new index is built and then swapped in, so lookups running on other
+        threads never see a half-built one.
+        """
+        index = PhraseIndex(self.lookup)
+        for cat, phrases in self.categories.items():
+            for dict_phrase, alternatives in phrases.items():
+                index.add(cat, dict_phrase, alternatives)
+        self.index = index
     
     def save_dictionary(self):
-        """Save the dictionary to file"""
-        try:
-            with open(self.dictionary_file, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'categories': self.categories,
-                    'frequency': self.frequency,
-                    'last_updated': datetime.now().isoformat()
-                }, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            logger.error(f"Error saving dictionary: {str(e)}")
+        """Save the dictionary to file
+        
+        The file is written under a temporary name and renamed over the old
+        one, so readers and crashes never see a half-written dictionary.
+        """
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            self._pending_updates = 0
+            data = json.dumps({
+                'categories': self.categories,
+                'frequency': self.frequency,
+                'last_updated': datetime.now().isoformat()
+            }, indent=2, ensure_ascii=False)
+            
+            temp_file = f"{self.dictionary_file}.{os.getpid()}.tmp"
+            try:
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    f.write(data)
+                os.replace(temp_file, self.dictionary_file)
+            except Exception as e:
+                logger.error(f"Error saving dictionary: {str(e)}")
+                try:
+                    os.remove(temp_file)
+                except OSError:
+                    pass
+    
+    def flush(self):
+        """Write pending usage counts, if any"""
+        with self._lock:
+            if self._pending_updates:
+                self.save_dictionary()
     
     def add_phrase(self, phrase: str, category: str = "general", alternatives: List[str] = None):
         """Add a phrase to the dictionary"""
         if category not in self.categories:
             raise ValueError(f"Invalid category: {category}")
         
-        self.categories[category][phrase] = alternatives or []
-        self.frequency[phrase] = self.frequency.get(phrase, 0)
-        self.save_dictionary()
+        with self._lock:
+            replaced = phrase in self.categories[category]
+            self.categories[category][phrase] = alternatives or []
+            self.frequency[phrase] = self.frequency.get(phrase, 0)
+            if replaced:
+                self._build_index()  # Old alternatives must stop matching
+            else:
+                self.index.add(category, phrase, alternatives or [])
+            self.save_dictionary()
     
     def remove_phrase(self, phrase: str, category: str = None):
         """Remove a phrase from the dictionary"""
-        if category:
-            if category in self.categories and phrase in self.categories[category]:
-                del self.categories[category][phrase]
-        else:
-            for cat in self.categories:
-                if phrase in self.categories[cat]:
-                    del self.categories[cat][phrase]
-        
-        if phrase in self.frequency:
-            del self.frequency[phrase]
-        
-        self.save_dictionary()
+        with self._lock:
+            if category:
+                if category in self.categories and phrase in self.categories[category]:
+                    del self.categories[category][phrase]
+            else:
+                for cat in self.categories:
+                    if phrase in self.categories[cat]:
+                        del self.categories[cat][phrase]
+            
+            if phrase in self.frequency:
+                del self.frequency[phrase]
+            
+            self._build_index()
+            self.save_dictionary()
     
-    def find_closest_match(self, phrase: str, category: str = None) -> Tuple[Optional[str], float]:
-        """Find the closest matching phrase in the dictionary"""
-        min_distance = float('inf')
-        best_match = None
-        
-        categories_to_search = [category] if category else self.categories.keys()
+    def find_closest_match(self, phrase: str, category: str = None,
+                           max_distance: int = MAX_EDIT_DISTANCE) -> Tuple[Optional[str], float]:
+        """Find the closest matching phrase within max_distance (at most MAX_EDIT_DISTANCE) edits
         
-        for cat in categories_to_search:
-            if cat not in self.categories:
-                continue
-                
-            for dict_phrase in self.categories[cat]:
-                # Calculate Levenshtein distance
-                dist = distance(phrase.lower(), dict_phrase.lower())
-                
-                # Update best match if this distance is smaller
-                if dist < min_distance:
-                    min_distance = dist
-                    best_match = dict_phrase
-                
-                # Also check alternatives
-                for alt in self.categories[cat][dict_phrase]:
-                    dist = distance(phrase.lower(), alt.lower())
-                    if dist < min_distance:
-                        min_distance = dist
-                        best_match = dict_phrase
+        Matching an alternative returns the phrase it belongs to. Ties go to
+        the entry added first.
+        """
+        index = self.index
+        best = None
+        for term, dist in index.terms.lookup(phrase.lower(), max_distance):
+            for order, cat, dict_phrase in index.owners.get(term, ()):
+                if category and cat != category:
+                    continue
+                candidate = (dist, order, dict_phrase)
+                if best is None or candidate < best:
+                    best = candidate
         
-        if best_match:
+        if best:
             # Convert distance to similarity score (0 to 1)
+            min_distance, _, best_match = best
             max_len = max(len(phrase), len(best_match))
             similarity = 1 - (min_distance / max_len if max_len > 0 else 0)
             return best_match, similarity
@@ -105,9 +287,18 @@ class PhraseDictionary:
     
     def update_frequency(self, phrase: str):
         """Update the usage frequency of a phrase"""
-        if phrase in self.frequency:
+        with self._lock:
+            if phrase not in self.frequency:
+                return
             self.frequency[phrase] += 1
-            self.save_dictionary()
+            self._pending_updates += 1
+            
+            if self._pending_updates >= self.flush_every:
+                self.save_dictionary()
+            elif self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.flush_interval, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
     
     def get_alternatives(self, phrase: str, category: str = None) -> List[str]:
         """Get alternative spellings/forms of a phrase"""
@@ -124,23 +315,94 @@ class PhraseDictionary:
         """Get the most frequently used phrases"""
         return sorted(self.frequency.items(), key=lambda x: x[1], reverse=True)[:limit]
     
+    @staticmethod
+    def _edit_budget(token, min_similarity):
+        """Edits allowed when looking up one token
+        
+        Roughly what a word of this length can need and still reach
+        min_similarity, but at least one: a short syllable may differ by an
+        edit and still leave a longer phrase similar enough.
+        """
+        return max(1, min(MAX_EDIT_DISTANCE, int((1 - min_similarity) * (len(token) + MAX_EDIT_DISTANCE) + 1e-9)))
+    
+    def _longest_phrase(self, index, spans, tokens, start, close_tokens, min_similarity):
+        """Longest dictionary entry matching tokens from start on
+        
+        Walks the trie one transcript token at a time, following children
+        that equal the token or are within its edit budget. Returns
+        (end, phrase, similarity) for the longest entry that is similar
+        enough, or None.
+        """
+        best = None
+        states = [(index.trie, 0)]  # (node, edits so far)
+        for end in range(start, len(tokens)):
+            if close_tokens[end] is None:
+                budget = self._edit_budget(tokens[end], min_similarity)
+                close_tokens[end] = dict(index.token_index.lookup(tokens[end], budget))
+            next_states = []
+            for node, edits in states:
+                for token, dist in close_tokens[end].items():
+                    child = node.get(token)
+                    if child is not None:
+                        next_states.append((child, edits + dist))
+            if not next_states:
+                break
+            
+            length = spans[end][1] - spans[start][0]
+            for node, edits in next_states:
+                entry = node.get(_ENTRY)
+                if entry is None:
+                    continue
+                order, phrase = entry
+                max_len = max(length, len(phrase))
+                similarity = 1 - (edits / max_len if max_len > 0 else 0)
+                candidate = (end + 1, similarity, -order, phrase)
+                if similarity >= min_similarity and (best is None or candidate > best):
+                    best = candidate
+            states = next_states
+        
+        if best is None:
+            return None
+        end, similarity, _, phrase = best
+        return end, phrase, similarity
+    
     def correct_text(self, text: str, min_similarity: float = 0.8) -> Tuple[str, List[Tuple[str, str, float]]]:
-        """Correct text using the phrase dictionary"""
-        words = text.split()
+        """Correct text using the phrase dictionary
+        
+        One pass over the words replaces the longest matching span at each
+        position; words that start no multi-word match are looked up on
+        their own. Text between replaced spans is kept as it was.
+        """
+        index = self.index  # Stays consistent even if phrases change meanwhile
+        spans = token_spans(text)
+        tokens = [text[start:end].lower() for start, end in spans]
+        close_tokens = [None] * len(tokens)  # Fuzzy token lookups, done once per position
         corrections = []
-        corrected_words = []
+        pieces = []
+        copied_to = 0
         
-        for word in words:
-            match, similarity = self.find_closest_match(word)
+        i = 0
+        while i < len(spans):
+            match = self._longest_phrase(index, spans, tokens, i, close_tokens, min_similarity)
+            if match is None:
+                word = text[spans[i][0]:spans[i][1]]
+                phrase, similarity = self.find_closest_match(word, max_distance=self._edit_budget(word, min_similarity))
+                match = (i + 1, phrase, similarity) if phrase and similarity >= min_similarity else None
+            if match is None:
+                i += 1
+                continue
             
-            if match and similarity >= min_similarity:
-                corrections.append((word, match, similarity))
-                corrected_words.append(match)
-                self.update_frequency(match)
-            else:
-                corrected_words.append(word)
+            end, phrase, similarity = match
+            original = text[spans[i][0]:spans[end - 1][1]]
+            corrections.append((original, phrase, similarity))
+            pieces.append(text[copied_to:spans[i][0]])
+            pieces.append(phrase)
+            copied_to = spans[end - 1][1]
+            self.update_frequency(phrase)
+            i = end
         
-        return ' '.join(corrected_words), corrections
+        pieces.append(text[copied_to:])
+        return ''.join(pieces), corrections
 
 def main():
     """Test the phrase dictionary functionality"""
@@ -199,6 +461,39 @@ def main():
         print(f"Corrections: {corrections}")
     
     print(f"\nDictionary saved to: {pd.dictionary_file}")
+    
+    benchmark_lookups()
+
+def benchmark_lookups(sizes=(1000, 10000), queries=500, seed=0):
+    """Time find_closest_match with each lookup index on random dictionaries"""
+    rng = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    
+    def misspell(word):
+        position = rng.randrange(len(word))
+        return word[:position] + rng.choice(letters) + word[position + 1:]
+    
+    print("\nLookup benchmark (ms per find_closest_match):")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            words = {''.join(rng.choices(letters, k=rng.randint(4, 12))) for _ in range(size)}
+            sample = rng.sample(sorted(words), min(queries, len(words)))
+            probes = [misspell(word) for word in sample]
+            
+            results = {}
+            timings = []
+            for lookup in TERM_INDEXES:
+                pd = PhraseDictionary(os.path.join(directory, f'{lookup}.json'), lookup=lookup)
+                pd.categories['general'] = {word: [] for word in words}
+                pd._build_index()
+                
+                start = time.perf_counter()
+                results[lookup] = [pd.find_closest_match(probe)[1] for probe in probes]
+                timings.append(f"{lookup} {(time.perf_counter() - start) * 1000 / len(probes):.3f}")
+            
+            # Similarity (not phrase) is compared: equally close phrases may tie
+            agree = sum(len(set(scores)) == 1 for scores in zip(*results.values()))
+            print(f"  {size} phrases: {', '.join(timings)} ({agree}/{len(probes)} lookups agree)")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -0,0 +1,201 @@
+"""
+Shared worker pool that runs recognition jobs for all streaming sessions
+"""
+import logging
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class RecognitionScheduler:
+    """Fixed pool of worker threads shared by every streaming session
+
+    Sessions are registered by id and signalled with notify() whenever they
+    may have work (new audio, decoder output). Workers take ready sessions
+    round-robin and call session.next_job(); a session that produced a job
+    goes back to the end of the ready queue, so one busy session cannot
+    starve the others. At most max_inflight_per_session jobs of a session
+    run at once, and every registered session is re-checked each
+    sweep_interval seconds so time-based flushes still happen.
+
+    A session must provide session_id, next_job() returning a callable or
+    None, and queue_stats() returning a dict of ingest queue counters.
+    """
+
+    def __init__(self, num_workers=4, max_inflight_per_session=2, sweep_interval=0.5):
+        self.num_workers = num_workers
+        self.max_inflight_per_session = max_inflight_per_session
+        self.sweep_interval = sweep_interval
+
+        self._sessions = {}
+        self._inflight = {}
+        self._ready = deque()
+        self._queued = set()
+        self._cond = threading.Condition()
+        self._workers = []
+        self._last_sweep = time.monotonic()
+
+        self.completed_jobs = 0
+        self.failed_jobs = 0
+
+    def _start_workers(self):
+        """Start the worker threads on first use (after any process fork)"""
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._worker, name=f'recognition-worker-{i}')
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    def register(self, session):
+        """Add a session to the schedule"""
+        with self._cond:
+            if not self._workers:
+                self._start_workers()
+            self._sessions[session.session_id] = session
+            self._inflight.setdefault(session.session_id, 0)
+
+    def unregister(self, session_id):
+        """Remove a session; jobs already running are allowed to finish"""
+        with self._cond:
+            self._sessions.pop(session_id, None)
+            self._queued.discard(session_id)
+            if not self._inflight.get(session_id):
+                self._inflight.pop(session_id, None)
+
+    def notify(self, session_id):
+        """Mark a session as possibly having work"""
+        with self._cond:
+            self._enqueue(session_id)
+
+    def _enqueue(self, session_id):
+        if session_id in self._sessions and session_id not in self._queued:
+            self._queued.add(session_id)
+            self._ready.append(session_id)
+            self._cond.notify()
+
+    def _sweep(self):
+        """Queue every session so time-based processing is not missed"""
+        self._last_sweep = time.monotonic()
+        for session_id in self._sessions:
+            self._enqueue(session_id)
+
+    def _claim(self):
+        """Wait for the next ready session below its in-flight limit"""
+        with self._cond:
+            while True:
+                if time.monotonic() - self._last_sweep >= self.sweep_interval:
+                    self._sweep()
+
+                if not self._ready:
+                    self._cond.wait(timeout=self.sweep_interval)
+                    continue
+
+                session_id = self._ready.popleft()
+                self._queued.discard(session_id)
+                session = self._sessions.get(session_id)
+                # Sessions at their limit are re-queued when a job finishes
+                if session is None or self._inflight[session_id] >= self.max_inflight_per_session:
+                    continue
+
+                self._inflight[session_id] += 1
+                return session
+
+    def _release(self, session, ran_job, failed):
+        with self._cond:
+            session_id = session.session_id
+            self._inflight[session_id] -= 1
+            if session_id not in self._sessions and not self._inflight[session_id]:
+                del self._inflight[session_id]
+            if ran_job:
+                if failed:
+                    self.failed_jobs += 1
+                else:
+                    self.completed_jobs += 1
+                # More audio may have queued up while the job was running
+                self._enqueue(session_id)
+
+    def _worker(self):
+        while True:
+            session = self._claim()
+            job = None
+            failed = False
+            try:
+                job = session.next_job()
+                if job is not None:
+                    # Let other sessions (or a second job of this one) go next
+                    self.notify(session.session_id)
+                    job()
+            except Exception as e:
+                failed = True
+                logger.error(f"Recognition job failed for session {session.session_id}: {e}")
+            finally:
+                self._release(session, job is not None, failed)
+
+    def stats(self):
+        """Queue depth and throughput metrics"""
+        with self._cond:
+            sessions = list(self._sessions.values())
+            stats = {
+                'workers': len(self._workers),
+                'sessions': len(sessions),
+                'ready_sessions': len(self._ready),
+                'inflight_jobs': sum(self._inflight.values()),
+                'max_inflight_per_session': self.max_inflight_per_session,
+                'completed_jobs': self.completed_jobs,
+                'failed_jobs': self.failed_jobs
+            }
+
+        max_depth = 0
+        for session in sessions:
+            queue_stats = session.queue_stats()
+            max_depth = max(max_depth, queue_stats.get('queued_chunks', 0))
+            for name, value in queue_stats.items():
+                stats[name] = stats.get(name, 0) + value
+        stats['max_session_queue_depth'] = max_depth
+        return stats
+
+
+class OrderedCompletions:
+    """Hands results of concurrently running jobs to emit() in job order
+
+    Each job takes a sequence number with take() when it is created and
+    reports its result with finish(), in whatever order jobs complete.
+    close(result) emits result once every job taken before it has been
+    emitted; results that arrive after that are dropped. Not thread-safe:
+    callers hold their own lock around every call.
+    """
+
+    def __init__(self, emit):
+        self.emit = emit
+        self.closed = False
+        self._next_seq = 0
+        self._next_emit_seq = 0
+        self._finished = {}
+        self._close_seq = None
+
+    def take(self):
+        seq = self._next_seq
+        self._next_seq += 1
+        return seq
+
+    def finish(self, seq, result):
+        """Record a finished job and emit every result that is now in order"""
+        if self.closed:
+            return
+        self._finished[seq] = result
+        while self._next_emit_seq in self._finished:
+            seq = self._next_emit_seq
+            self._next_emit_seq += 1
+            self.emit(self._finished.pop(seq))
+            if seq == self._close_seq:
+                self.closed = True
+                self._finished.clear()
+                return
+
+    def close(self, result):
+        """Emit result after every job taken so far, then stop emitting"""
+        if self._close_seq is None:
+            self._close_seq = self.take()
+            self.finish(self._close_seq, result)
@@ -0,0 +1,243 @@
+"""
+Interchangeable speech recognition backends
+"""
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from speech_client_pool import get_client_pool
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LANGUAGE = 'lo-LA'
+SAMPLE_WIDTH = 2  # All backends take 16-bit mono PCM
+ESTIMATED_CONFIDENCE = 0.85  # Used when a service does not report one
+
+FAKE_TRANSCRIPTS = [
+    'ສະບາຍດີ',
+    'ຂອບໃຈຫຼາຍໆ',
+    'ມື້ນີ້ອາກາດດີ',
+    'ພວກເຮົາຈະປະຊຸມກັນຕອນບ່າຍ',
+    'ກະລຸນາສົ່ງເອກະສານໃຫ້ຂ້ອຍ'
+]
+
+
+class RecognitionError(Exception):
+    """The recognition service failed or could not be reached"""
+
+
+class NoSpeechError(Exception):
+    """The audio was processed but no speech was recognized"""
+
+
+def _pcm_bytes(pcm):
+    """Accept bytes, memoryviews or int16 arrays without copying where possible"""
+    if isinstance(pcm, np.ndarray):
+        return memoryview(np.ascontiguousarray(pcm, dtype=np.int16)).cast('B')
+    return pcm
+
+
+class RecognizerBackend:
+    """Common interface for every recognition service
+
+    Audio is always 16-bit mono little-endian PCM. recognize() handles one
+    complete recording and returns a list of result segments, each a list
+    of {'text', 'confidence'} alternatives with the best first. Services
+    that report timing also set 'start_offset' / 'end_offset' (seconds from
+    the start of the recording) on the alternatives of each segment.
+    Backends raise NoSpeechError when nothing was recognized and
+    RecognitionError when the service fails.
+    """
+
+    name = None
+
+    def recognize(self, pcm, sample_rate=16000, language=DEFAULT_LANGUAGE, max_alternatives=1):
+        raise NotImplementedError
+
+    def recognize_window(self, pcm, sample_rate=16000, language=DEFAULT_LANGUAGE):
+        """Transcribe one short streaming window; returns (text, confidence)"""
+        best = [segment[0] for segment in self.recognize(pcm, sample_rate, language) if segment]
+        text = ' '.join(alternative['text'] for alternative in best).strip()
+        if not text:
+            raise NoSpeechError("No speech recognized in window")
+        return text, sum(alternative['confidence'] for alternative in best) / len(best)
+
+    def recognize_batch(self, recordings, sample_rate=16000, language=DEFAULT_LANGUAGE,
+                        max_alternatives=1, max_workers=1):
+        """Transcribe several recordings, returning results in input order
+
+        A recording with no speech yields an empty list; service errors
+        propagate.
+        """
+        def recognize_one(pcm):
+            try:
+                return self.recognize(pcm, sample_rate, language, max_alternatives)
+            except NoSpeechError:
+                return []
+
+        if max_workers <= 1 or len(recordings) <= 1:
+            return [recognize_one(pcm) for pcm in recordings]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(recordings))) as executor:
+            return list(executor.map(recognize_one, recordings))
+
+
+class GoogleWebBackend(RecognizerBackend):
+    """Free Google Web Speech API through the speech_recognition package"""
+
+    name = 'google_web'
+
+    def __init__(self):
+        import speech_recognition as sr
+        self._sr = sr
+        self._recognizer = sr.Recognizer()
+
+    def recognize(self, pcm, sample_rate=16000, language=DEFAULT_LANGUAGE, max_alternatives=1):
+        audio = self._sr.AudioData(_pcm_bytes(pcm), sample_rate, SAMPLE_WIDTH)
+        try:
+            response = self._recognizer.recognize_google(audio, language=language, show_all=True)
+        except self._sr.UnknownValueError as e:
+            raise NoSpeechError(str(e))
+        except self._sr.RequestError as e:
+            raise RecognitionError(str(e))
+
+        alternatives = response.get('alternative', []) if isinstance(response, dict) else []
+        alternatives = [
+            {'text': alternative['transcript'],
+             'confidence': alternative.get('confidence', ESTIMATED_CONFIDENCE)}
+            for alternative in alternatives[:max_alternatives] if alternative.get('transcript')
+        ]
+        if not alternatives:
+            raise NoSpeechError("No speech recognized")
+        return [alternatives]
+
+
+class GoogleCloudBackend(RecognizerBackend):
+    """Google Cloud Speech-to-Text synchronous recognition
+
+    Requests run on clients borrowed from the process-wide SpeechClientPool
+    unless a pool is passed in.
+    """
+
+    name = 'google_cloud'
+
+    def __init__(self, enable_automatic_punctuation=True, client_pool=None):
+        from google.api_core import exceptions as api_exceptions
+        from google.cloud import speech_v1p1beta1 as speech
+        self._speech = speech
+        self._api_error = api_exceptions.GoogleAPIError
+        self.enable_automatic_punctuation = enable_automatic_punctuation
+        self.client_pool = client_pool or get_client_pool()
+
+    def recognize(self, pcm, sample_rate=16000, language=DEFAULT_LANGUAGE, max_alternatives=1):
+        speech = self._speech
+        config = speech.RecognitionConfig(
+            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+            sample_rate_hertz=sample_rate,
+            language_code=language,
+            enable_automatic_punctuation=self.enable_automatic_punctuation,
+            enable_word_time_offsets=True,
+            max_alternatives=max_alternatives,
+        )
+        audio = speech.RecognitionAudio(content=bytes(_pcm_bytes(pcm)))
+
+        try:
+            response = self.client_pool.run(lambda client: client.recognize(config=config, audio=audio))
+        except self._api_error as e:
+            raise RecognitionError(str(e))
+
+        segments = []
+        previous_end = 0.0
+        for result in response.results:
+            if not result.alternatives:
+                continue
+            # A result starts at its first word, or else where the previous one ended
+            words = result.alternatives[0].words
+            start = words[0].start_time.total_seconds() if words else previous_end
+            end = result.result_end_time.total_seconds() or (words[-1].end_time.total_seconds() if words else None)
+            timing = {'start_offset': start}
+            if end:
+                timing['end_offset'] = previous_end = end
+            segments.append([
+                dict(timing, text=alternative.transcript, confidence=alternative.confidence)
+                for alternative in result.alternatives
+            ])
+        if not segments:
+            raise NoSpeechError("No transcription results")
+        return segments
+
+
+class FakeBackend(RecognizerBackend):
+    """Deterministic local stand-in for load tests and offline benchmarks
+
+    Each call sleeps for latency (+/- jitter, plus latency_per_second for
+    every second of audio), then fails with probability error_rate, reports
+    no speech with probability no_speech_rate, or returns the next canned
+    transcript. All random draws come from one seeded generator, so the same
+    sequence of calls always gives the same results.
+    """
+
+    name = 'fake'
+
+    def __init__(self, latency=0.3, jitter=0.1, latency_per_second=0.0, error_rate=0.0,
+                 no_speech_rate=0.0, transcripts=None, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.latency_per_second = latency_per_second
+        self.error_rate = error_rate
+        self.no_speech_rate = no_speech_rate
+        self.transcripts = list(transcripts or FAKE_TRANSCRIPTS)
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def recognize(self, pcm, sample_rate=16000, language=DEFAULT_LANGUAGE, max_alternatives=1):
+        duration = len(_pcm_bytes(pcm)) / (SAMPLE_WIDTH * sample_rate)
+        with self._lock:
+            index = self.calls
+            self.calls += 1
+            delay = self.latency + self._rng.uniform(-self.jitter, self.jitter)
+            roll = self._rng.random()
+
+        time.sleep(max(0.0, delay + duration * self.latency_per_second))
+        if roll < self.error_rate:
+            raise RecognitionError(f"Simulated recognition failure (call {index})")
+        if roll < self.error_rate + self.no_speech_rate:
+            raise NoSpeechError("Simulated silence")
+
+        text = self.transcripts[index % len(self.transcripts)]
+        alternatives = [{'text': text, 'confidence': 0.9}]
+        words = text.split()
+        for rank in range(1, min(max_alternatives, len(words))):
+            alternatives.append({'text': ' '.join(words[:-rank]), 'confidence': 0.9 - 0.1 * rank})
+        return [alternatives]
+
+
+def load_transcripts(path):
+    """Read canned transcripts for the fake backend, one per line"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def create_backend(name, config=None):
+    """Build the backend called `name`, reading its options from a config mapping"""
+    config = config or {}
+    if name == GoogleWebBackend.name:
+        return GoogleWebBackend()
+    if name == GoogleCloudBackend.name:
+        return GoogleCloudBackend(client_pool=get_client_pool(config.get('SPEECH_CLIENT_POOL_SIZE', 4)))
+    if name == FakeBackend.name:
+        transcripts_file = config.get('FAKE_RECOGNIZER_TRANSCRIPTS')
+        return FakeBackend(
+            latency=config.get('FAKE_RECOGNIZER_LATENCY', 0.3),
+            jitter=config.get('FAKE_RECOGNIZER_JITTER', 0.1),
+            latency_per_second=config.get('FAKE_RECOGNIZER_LATENCY_PER_SECOND', 0.0),
+            error_rate=config.get('FAKE_RECOGNIZER_ERROR_RATE', 0.0),
+            no_speech_rate=config.get('FAKE_RECOGNIZER_NO_SPEECH_RATE', 0.0),
+            transcripts=load_transcripts(transcripts_file) if transcripts_file else None,
+            seed=config.get('FAKE_RECOGNIZER_SEED', 0)
+        )
+    raise ValueError(f"Unknown recognizer backend: {name}")
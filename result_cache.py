@@ -0,0 +1,151 @@
+"""
+Content-addressed cache of transcription results on disk
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import wave
+
+logger = logging.getLogger(__name__)
+
+
+def wav_content_hash(path, block_frames=65536):
+    """SHA-256 of a WAV file's sample format and decoded frames
+
+    Two uploads of the same recording hash alike even if their headers
+    differ (e.g. extra metadata chunks).
+    """
+    digest = hashlib.sha256()
+    with wave.open(path, 'rb') as wav_file:
+        digest.update(f'{wav_file.getnchannels()}:{wav_file.getsampwidth()}:{wav_file.getframerate()}:'.encode())
+        while True:
+            frames = wav_file.readframes(block_frames)
+            if not frames:
+                break
+            digest.update(frames)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Transcription results stored as JSON files named by content key
+
+    A key combines a hash of the audio with every option that changes what
+    the recognizer returns. Entries expire after ttl_seconds; when the cache
+    holds more than max_entries or max_bytes, the least recently used
+    entries are removed. Writes are atomic, so several processes can share
+    the directory.
+    """
+
+    def __init__(self, directory, ttl_seconds=7 * 24 * 3600, max_entries=5000, max_bytes=200 * 1024 * 1024):
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(content_hash, **options):
+        """Cache key for audio (already hashed) recognized with the given options"""
+        encoded = json.dumps(options, sort_keys=True, default=str)
+        return hashlib.sha256(f'{content_hash}:{encoded}'.encode()).hexdigest()
+
+    @staticmethod
+    def hash_pcm(pcm):
+        return hashlib.sha256(pcm).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key):
+        """Return the cached result, or None on a miss or expired entry"""
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl_seconds:
+                os.remove(path)
+                raise FileNotFoundError(path)
+            with open(path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            os.utime(path)  # Mark as recently used
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def put(self, key, result):
+        """Store a result and evict old entries if the cache is over its limits"""
+        path = self._path(key)
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to cache transcription result: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+        self.evict()
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith('.json'):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def evict(self):
+        """Remove expired entries, then the least recently used ones over the limits"""
+        now = time.time()
+        kept = []
+        removed = 0
+        for mtime, size, path in self._entries():
+            if now - mtime > self.ttl_seconds:
+                removed += self._remove(path)
+            else:
+                kept.append((mtime, size, path))
+
+        kept.sort()
+        total_bytes = sum(size for _, size, _ in kept)
+        count = len(kept)
+        for _, size, path in kept:
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            removed += self._remove(path)
+            count -= 1
+            total_bytes -= size
+        return removed
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
+
+    def stats(self):
+        entries = self._entries()
+        with self._lock:
+            return {
+                'entries': len(entries),
+                'bytes': sum(size for _, size, _ in entries),
+                'hits': self.hits,
+                'misses': self.misses
+            }
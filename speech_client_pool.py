@@ -0,0 +1,123 @@
+"""
+Process-wide pool of Google Cloud Speech clients
+"""
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class SpeechClientPool:
+    """Lazily created, thread-safe pool of SpeechClient instances
+
+    Every SpeechClient owns a gRPC channel, so reusing clients skips
+    credential discovery and the TLS handshake on every request. Clients are
+    only created when a request needs one and no idle client is free, up to
+    `size`; further callers wait. A client whose call fails with a
+    connection-level error is closed and dropped, and the next checkout
+    connects again.
+    """
+
+    def __init__(self, size=4, factory=None):
+        self.size = size
+        self._factory = factory
+        self._idle = deque()
+        self._created = 0
+        self._cond = threading.Condition()
+        self._unhealthy_errors = None
+        self.reconnects = 0
+
+    def _create_client(self):
+        if self._factory is not None:
+            return self._factory()
+        from google.cloud import speech_v1p1beta1 as speech
+        return speech.SpeechClient()
+
+    @property
+    def unhealthy_errors(self):
+        """Errors after which a client's channel is not trusted any more"""
+        if self._unhealthy_errors is None:
+            try:
+                from google.api_core import exceptions
+                self._unhealthy_errors = (exceptions.ServiceUnavailable, exceptions.Unauthenticated)
+            except ImportError:
+                self._unhealthy_errors = (ConnectionError,)
+        return self._unhealthy_errors
+
+    @staticmethod
+    def _close_client(client):
+        try:
+            client.transport.close()
+        except Exception as e:
+            logger.debug(f"Failed to close speech client: {e}")
+
+    @contextmanager
+    def client(self):
+        """Borrow a client for the duration of the with block"""
+        with self._cond:
+            while not self._idle and self._created >= self.size:
+                self._cond.wait()
+            client = self._idle.pop() if self._idle else None
+            if client is None:
+                self._created += 1
+
+        if client is None:
+            try:
+                client = self._create_client()
+            except Exception:
+                with self._cond:
+                    self._created -= 1
+                    self._cond.notify()
+                raise
+
+        healthy = True
+        try:
+            yield client
+        except self.unhealthy_errors:
+            healthy = False
+            raise
+        finally:
+            with self._cond:
+                if healthy:
+                    self._idle.append(client)
+                else:
+                    self._created -= 1
+                    self.reconnects += 1
+                self._cond.notify()
+            if not healthy:
+                logger.warning("Speech client connection failed, reconnecting on next use")
+                self._close_client(client)
+
+    def run(self, call, retries=1):
+        """Run call(client) on a pooled client, retrying on a fresh connection"""
+        for attempt in range(retries + 1):
+            try:
+                with self.client() as client:
+                    return call(client)
+            except self.unhealthy_errors:
+                if attempt == retries:
+                    raise
+
+    def stats(self):
+        with self._cond:
+            return {
+                'size': self.size,
+                'clients': self._created,
+                'idle_clients': len(self._idle),
+                'reconnects': self.reconnects
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_client_pool(size=4):
+    """Return the process-wide pool, creating it with `size` on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SpeechClientPool(size=size)
+        return _pool
@@ -43,9 +43,14 @@ document.addEventListener("DOMContentLoaded", function () {
   let socket = null;
   let streamingSessionId = null;
   let audioChunkCounter = 0;
+  let audioSendChain = Promise.resolve(); // Keeps audio chunks in recording order
+  let audioChunksPerSend = 1; // Raised by server backpressure
+  let pendingAudioParts = [];
   let transcriptChunks = [];
   let completeFinalTranscript = '';
   let lastInterimElement = null;
+  let lastTranscriptSeq = 0; // Server result deltas are applied once, in order
+  let serverPartialElement = null;
   let processedResultsCount = 0;
   let recognitionRestartCount = 0;
 
@@ -219,6 +224,13 @@ document.addEventListener("DOMContentLoaded", function () {
       }
     });
 
+    socket.on('backpressure', function(data) {
+      // Batch recorder chunks into larger sends while the server catches up.
+      // The recorder keeps running so the WebM stream stays continuous.
+      audioChunksPerSend = data.active ? Math.max(1, Math.round(data.suggested_timeslice_ms / 250)) : 1;
+      console.warn('Server backpressure', data.active ? 'on' : 'off', '- sending every', audioChunksPerSend, 'chunk(s)');
+    });
+
     socket.on('audio_quality_warning', function(data) {
       console.warn('Audio quality warning:', data);
       showAlert('warning', `<i class='fas fa-volume-down'></i> Audio Quality: ${data.message}`);
@@ -425,6 +437,8 @@ document.addEventListener("DOMContentLoaded", function () {
     // Reset transcript variables for new session
     completeFinalTranscript = '';
     lastInterimElement = null;
+    lastTranscriptSeq = 0;
+    serverPartialElement = null;
     processedResultsCount = 0;
     recognitionRestartCount = 0;
 
@@ -468,22 +482,30 @@ document.addEventListener("DOMContentLoaded", function () {
 
     try {
       const mediaRecorder = new MediaRecorder(stream, options);
+      pendingAudioParts = [];
+      audioChunksPerSend = 1;
 
       // Capture smaller, more frequent chunks (250ms each)
       const chunkInterval = 250; // milliseconds
 
       mediaRecorder.ondataavailable = function(event) {
         if (event.data.size > 0 && streamingSessionId) {
-          // Convert blob to base64 and send to backend
-          const reader = new FileReader();
-          reader.onload = function() {
-            const base64Data = reader.result.split(',')[1];
-            socket.emit('audio_chunk', {
-              session_id: streamingSessionId,
-              audio_data: base64Data
-            });
-          };
-          reader.readAsDataURL(event.data);
+          pendingAudioParts.push(event.data);
+          if (pendingAudioParts.length < audioChunksPerSend) return;
+          const blob = new Blob(pendingAudioParts, { type: event.data.type });
+          pendingAudioParts = [];
+
+          // Chunks are pieces of one WebM stream, so they must be sent in order
+          audioSendChain = audioSendChain
+            .then(() => encodeAudioChunk(blob))
+            .then(audioData => {
+              if (!streamingSessionId) return;
+              socket.emit('audio_chunk', {
+                session_id: streamingSessionId,
+                audio_data: audioData
+              });
+            })
+            .catch(error => console.error('Failed to send audio chunk:', error));
         }
       };
 
@@ -506,6 +528,21 @@ document.addEventListener("DOMContentLoaded", function () {
     }
   }
 
+  function encodeAudioChunk(blob) {
+    // Send raw bytes as a binary Socket.IO attachment when the browser can
+    if (typeof blob.arrayBuffer === 'function') {
+      return blob.arrayBuffer();
+    }
+
+    // Fallback: base64 text for older browsers
+    return new Promise((resolve, reject) => {
+      const reader = new FileReader();
+      reader.onload = () => resolve(reader.result.split(',')[1]);
+      reader.onerror = () => reject(reader.error);
+      reader.readAsDataURL(blob);
+    });
+  }
+
   function startBrowserSpeechRecognition() {
     // Check if browser supports Web Speech API
     if (!('webkitSpeechRecognition' in window) && !('SpeechRecognition' in window)) {
@@ -987,6 +1024,12 @@ document.addEventListener("DOMContentLoaded", function () {
   }
 
   function handleTranscriptionChunk(data) {
+    // Each delta appends finalized text and replaces the partial; skip stale ones
+    if (data.seq !== undefined) {
+      if (data.seq <= lastTranscriptSeq) return;
+      lastTranscriptSeq = data.seq;
+    }
+
     if (data.text && data.text.trim()) {
       const confidence = data.confidence || 0.5;
       const confidenceClass = confidence > 0.8 ? 'high' : confidence > 0.5 ? 'medium' : 'low';
@@ -1005,7 +1048,12 @@ document.addEventListener("DOMContentLoaded", function () {
         liveTranscriptText.innerHTML = '';
       }
 
-      liveTranscriptText.appendChild(chunkElement);
+      // Final text goes before the partial, which stays last
+      if (serverPartialElement && serverPartialElement.parentNode === liveTranscriptText) {
+        liveTranscriptText.insertBefore(chunkElement, serverPartialElement);
+      } else {
+        liveTranscriptText.appendChild(chunkElement);
+      }
 
       // Auto-scroll to bottom
       liveTranscriptText.scrollTop = liveTranscriptText.scrollHeight;
@@ -1022,6 +1070,33 @@ document.addEventListener("DOMContentLoaded", function () {
       updateStreamingStats();
       updateTranscriptionResult();
     }
+
+    if (data.partial !== undefined) {
+      updateServerPartial(data.partial);
+    }
+  }
+
+  function updateServerPartial(text) {
+    // The partial may still be revised, so it is replaced in place, never appended
+    if (!text || !text.trim()) {
+      if (serverPartialElement && serverPartialElement.parentNode) {
+        serverPartialElement.parentNode.removeChild(serverPartialElement);
+      }
+      serverPartialElement = null;
+      return;
+    }
+
+    if (liveTranscriptText.innerHTML.includes('Listening for speech')) {
+      liveTranscriptText.innerHTML = '';
+    }
+
+    if (!serverPartialElement || serverPartialElement.parentNode !== liveTranscriptText) {
+      serverPartialElement = document.createElement('span');
+      serverPartialElement.className = 'transcript-chunk interim-text';
+      liveTranscriptText.appendChild(serverPartialElement);
+    }
+    serverPartialElement.textContent = text.trim() + ' ';
+    liveTranscriptText.scrollTop = liveTranscriptText.scrollHeight;
   }
 
   function updateStreamingStats() {
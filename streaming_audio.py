@@ -0,0 +1,357 @@
+"""
+Incremental audio decoding for real-time transcription sessions
+"""
+import logging
+import os
+import selectors
+import subprocess
+import threading
+from collections import deque
+
+import numpy as np
+from pydub import AudioSegment
+
+logger = logging.getLogger(__name__)
+
+TARGET_SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # 16-bit signed PCM
+
+
+def decode_audio(data, input_format=None, sample_rate=TARGET_SAMPLE_RATE):
+    """Decode a complete compressed recording to mono PCM entirely in memory"""
+    command = [AudioSegment.converter, '-hide_banner', '-loglevel', 'error']
+    if input_format:
+        command += ['-f', input_format]
+    command += [
+        '-i', 'pipe:0',
+        '-f', 's16le',
+        '-acodec', 'pcm_s16le',
+        '-ac', '1',
+        '-ar', str(sample_rate),
+        'pipe:1'
+    ]
+
+    process = subprocess.run(command, input=bytes(data), capture_output=True)
+    if process.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed to decode audio: {process.stderr.decode(errors='ignore').strip()}")
+    return process.stdout
+
+
+class DecoderOutputPump:
+    """One thread that reads the output pipes of every active decoder
+
+    Decoders register their stdout here instead of starting a reader thread
+    each, so the number of threads does not grow with the number of
+    streaming sessions. Requires select() on pipes (POSIX).
+    """
+
+    def __init__(self):
+        self._selector = selectors.DefaultSelector()
+        self._wake_read, self._wake_write = os.pipe()
+        self._selector.register(self._wake_read, selectors.EVENT_READ, None)
+        self._pending = []
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def register(self, decoder):
+        """Start reading decoder output on the shared pump thread"""
+        with self._lock:
+            self._pending.append(decoder)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='decoder-output-pump')
+                self._thread.daemon = True
+                self._thread.start()
+        os.write(self._wake_write, b'\0')
+
+    def _run(self):
+        while True:
+            for key, _ in self._selector.select():
+                if key.data is None:
+                    # Woken up to pick up newly registered decoders
+                    os.read(self._wake_read, 512)
+                    with self._lock:
+                        pending, self._pending = self._pending, []
+                    for decoder in pending:
+                        self._selector.register(decoder.output_fd, selectors.EVENT_READ, decoder)
+                    continue
+
+                decoder = key.data
+                try:
+                    data = os.read(key.fd, decoder.read_size)
+                except OSError as e:
+                    logger.debug(f"Decoder output pipe failed: {e}")
+                    data = b''
+                if not data:
+                    self._selector.unregister(key.fd)
+                    decoder._output_closed()
+                else:
+                    decoder._receive_output(data)
+
+
+_output_pump = DecoderOutputPump() if os.name == 'posix' else None
+
+
+class IncrementalDecoder:
+    """Long-lived ffmpeg process turning a compressed stream into 16 kHz mono PCM
+
+    MediaRecorder chunks are consecutive pieces of a single WebM/Opus stream
+    (only the first one carries the container header), so every chunk is
+    written to the same ffmpeg process exactly once as it arrives. Decoded
+    samples are collected by the shared output pump (or a reader thread
+    where pipes cannot be polled) and handed out with drain(). The optional
+    on_output callback runs whenever new PCM becomes available.
+    """
+
+    def __init__(self, input_format='webm', sample_rate=TARGET_SAMPLE_RATE, read_size=4096, on_output=None):
+        self.input_format = input_format
+        self.sample_rate = sample_rate
+        self.read_size = read_size
+        self.on_output = on_output
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.failed = False
+
+        self._pcm = bytearray()
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        self._process = subprocess.Popen(
+            self._build_command(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL
+        )
+        self.output_fd = self._process.stdout.fileno()
+
+        if _output_pump is not None:
+            _output_pump.register(self)
+        else:
+            reader = threading.Thread(target=self._pump_output)
+            reader.daemon = True
+            reader.start()
+
+    def _build_command(self):
+        """Build the ffmpeg command line for pipe-to-pipe decoding"""
+        return [
+            AudioSegment.converter,
+            '-hide_banner',
+            '-loglevel', 'error',
+            '-analyzeduration', '0',
+            '-f', self.input_format,
+            '-i', 'pipe:0',
+            '-f', 's16le',
+            '-acodec', 'pcm_s16le',
+            '-ac', '1',
+            '-ar', str(self.sample_rate),
+            'pipe:1'
+        ]
+
+    def _pump_output(self):
+        """Collect decoded PCM from ffmpeg on a dedicated thread"""
+        stdout = self._process.stdout
+        try:
+            while True:
+                data = stdout.read1(self.read_size)
+                if not data:
+                    break
+                self._receive_output(data)
+        except Exception as e:
+            logger.debug(f"Decoder output pump stopped: {e}")
+        self._output_closed()
+
+    def _receive_output(self, data):
+        with self._lock:
+            self._pcm.extend(data)
+            self.bytes_out += len(data)
+        if self.on_output is not None:
+            try:
+                self.on_output()
+            except Exception as e:
+                logger.debug(f"Decoder output callback failed: {e}")
+
+    def _output_closed(self):
+        self._finished.set()
+
+    def feed(self, chunk):
+        """Write one compressed chunk to the decoder"""
+        if self.failed or not chunk:
+            return False
+
+        try:
+            self._process.stdin.write(chunk)
+            self._process.stdin.flush()
+            self.bytes_in += len(chunk)
+            return True
+        except (BrokenPipeError, OSError, ValueError) as e:
+            logger.error(f"Audio decoder stopped accepting data: {e}")
+            self.failed = True
+            return False
+
+    def drain(self):
+        """Return all whole samples decoded so far as raw PCM bytes"""
+        with self._lock:
+            usable = len(self._pcm) - (len(self._pcm) % SAMPLE_WIDTH)
+            if usable <= 0:
+                return b''
+            data = bytes(self._pcm[:usable])
+            del self._pcm[:usable]
+        return data
+
+    def close(self, timeout=2.0):
+        """Flush the remaining input and stop the ffmpeg process"""
+        try:
+            if self._process.stdin and not self._process.stdin.closed:
+                self._process.stdin.close()
+        except OSError:
+            pass
+
+        try:
+            self._process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+
+        # The pipe belongs to the output pump until it has seen end-of-file
+        if self._finished.wait(timeout=timeout):
+            self._process.stdout.close()
+
+
+class PCMRingBuffer:
+    """Fixed-capacity int16 sample buffer with zero-copy, sample-accurate reads
+
+    Positions are absolute sample indices since the start of the session.
+    Every sample is stored twice (at i and i + capacity) so that any range
+    of up to `capacity` samples is one contiguous slice of the backing
+    array and can be returned as a view without copying.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self._data = np.zeros(self.capacity * 2, dtype=np.int16)
+        self.write_position = 0
+
+    @property
+    def start_position(self):
+        """Absolute position of the oldest sample still held"""
+        return max(0, self.write_position - self.capacity)
+
+    def __len__(self):
+        return self.write_position - self.start_position
+
+    def write(self, samples):
+        """Append PCM samples (int16 array or raw little-endian bytes)"""
+        if isinstance(samples, (bytes, bytearray, memoryview)):
+            samples = np.frombuffer(samples, dtype=np.int16)
+        count = len(samples)
+        if count == 0:
+            return
+
+        # Only the newest `capacity` samples can ever be read back
+        if count > self.capacity:
+            self.write_position += count - self.capacity
+            samples = samples[-self.capacity:]
+            count = self.capacity
+
+        offset = self.write_position % self.capacity
+        first = min(count, self.capacity - offset)
+        rest = count - first
+
+        self._data[offset:offset + first] = samples[:first]
+        self._data[offset + self.capacity:offset + self.capacity + first] = samples[:first]
+        if rest:
+            self._data[:rest] = samples[first:]
+            self._data[self.capacity:self.capacity + rest] = samples[first:]
+
+        self.write_position += count
+
+    def view(self, start, end=None):
+        """Return a read-only view of samples in [start, end)"""
+        if end is None:
+            end = self.write_position
+        if start < self.start_position or end > self.write_position or start > end:
+            raise ValueError(
+                f"Range [{start}, {end}) outside buffered audio "
+                f"[{self.start_position}, {self.write_position})"
+            )
+
+        offset = start % self.capacity
+        window = self._data[offset:offset + (end - start)]
+        window.flags.writeable = False
+        return window
+
+
+class AudioIngestQueue:
+    """Bounded queue of compressed audio chunks with a backlog policy
+
+    The chunks are consecutive pieces of one WebM/Opus stream feeding one
+    decoder, so cutting bytes out of it would corrupt the container: every
+    chunk is kept and decoded in order. A full queue merges its chunks into
+    one, which is the same byte stream. Once more than max_queued_bytes are
+    waiting, over_limit() tells the session to decode them right away.
+
+    The policy decides what happens to a backlog:
+      block       - put() first waits up to block_timeout for room
+      drop_oldest - decoded audio older than the newest window is skipped
+                    (counted in dropped_samples), so results stay live
+      coalesce    - the whole backlog is recognized in catch-up windows
+    """
+
+    POLICIES = ('block', 'drop_oldest', 'coalesce')
+
+    def __init__(self, maxsize=40, policy='coalesce', block_timeout=0.5, max_queued_bytes=256 * 1024):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Invalid queue policy: {policy}")
+
+        self.maxsize = maxsize
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.max_queued_bytes = max_queued_bytes
+        self.coalesced_chunks = 0
+        self.dropped_samples = 0
+
+        self._items = deque()
+        self._bytes = 0
+        self._cond = threading.Condition()
+
+    def qsize(self):
+        return len(self._items)
+
+    def over_limit(self):
+        return self._bytes > self.max_queued_bytes
+
+    def put(self, chunk):
+        """Queue a chunk, merging the queued ones if the queue is full"""
+        with self._cond:
+            if len(self._items) >= self.maxsize and self.policy == 'block':
+                self._cond.wait_for(lambda: len(self._items) < self.maxsize, self.block_timeout)
+            if len(self._items) >= self.maxsize:
+                self.coalesced_chunks += len(self._items) - 1
+                merged = b''.join(self._items)
+                self._items.clear()
+                self._items.append(merged)
+
+            self._items.append(chunk)
+            self._bytes += len(chunk)
+
+    def get_all(self):
+        """Remove and return every queued chunk in arrival order"""
+        with self._cond:
+            items = list(self._items)
+            self._items.clear()
+            self._bytes = 0
+            self._cond.notify_all()
+        return items
+
+    def backlog_start(self, start, end, max_samples):
+        """Where recognition of the decoded backlog [start, end) should resume"""
+        if self.policy == 'drop_oldest' and end - start > max_samples:
+            self.dropped_samples += end - start - max_samples
+            return end - max_samples
+        return start
+
+    def stats(self):
+        return {
+            'queued_chunks': len(self._items),
+            'queued_bytes': self._bytes,
+            'coalesced_chunks': self.coalesced_chunks,
+            'dropped_samples': self.dropped_samples
+        }
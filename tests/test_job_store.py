@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+
+from job_store import COMPLETED, ERROR, PROCESSING, QUEUED, JobFailed, JobStore, JobWorkerPool
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / 'jobs.db'))
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.01)
+
+
+def test_each_job_is_claimed_once(store):
+    job_ids = {store.create({'n': i}) for i in range(40)}
+    claimed = []
+    lock = threading.Lock()
+
+    def claim_all(worker):
+        while True:
+            job = store.claim(worker, lease_seconds=60)
+            if job is None:
+                return
+            with lock:
+                claimed.append(job['id'])
+
+    threads = [threading.Thread(target=claim_all, args=(f'w{i}',)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(claimed) == sorted(job_ids)
+    assert store.counts() == {PROCESSING: 40}
+
+
+def test_claim_skips_jobs_not_yet_available(store):
+    job_id = store.create({})
+    store.update(job_id, available_at=time.time() + 60)
+    assert store.claim('w', lease_seconds=60) is None
+
+
+def test_requeue_stale_returns_expired_leases(store):
+    expired = store.create({})
+    store.create({})
+    store.claim('w', lease_seconds=-1)
+    alive = store.claim('w', lease_seconds=60)
+
+    assert store.requeue_stale() == 1
+    assert store.get(expired)['status'] == QUEUED
+    assert store.get(alive['id'])['status'] == PROCESSING
+    assert store.claim('w', lease_seconds=60)['attempts'] == 2
+
+
+def test_jobs_created_as_processing_expire(store):
+    job_id = store.create({}, status=PROCESSING, lease_seconds=-1)
+    assert store.claim('w', lease_seconds=60) is None
+    assert store.requeue_stale() == 1
+    assert store.claim('w', lease_seconds=60)['id'] == job_id
+
+
+def run_pool(store, handler, **kwargs):
+    cleaned = []
+    pool = JobWorkerPool(store, handler, num_workers=2, retry_delay=0, poll_interval=0.01,
+                         cleanup=cleaned.append, **kwargs)
+    pool.start()
+    return pool, cleaned
+
+
+def test_failing_job_is_retried_until_max_attempts(store):
+    calls = []
+
+    def handler(job):
+        calls.append(job['attempts'])
+        raise RuntimeError('service unavailable')
+
+    _, cleaned = run_pool(store, handler, max_attempts=3)
+    job_id = store.create({})
+    wait_for(lambda: store.get(job_id)['status'] == ERROR)
+
+    assert calls == [1, 2, 3]
+    assert store.get(job_id)['error'] == 'service unavailable'
+    wait_for(lambda: len(cleaned) == 1)
+
+
+def test_job_succeeds_on_retry(store):
+    def handler(job):
+        if job['attempts'] < 2:
+            raise RuntimeError('timeout')
+        store.update(job['id'], status=COMPLETED, completed_at=time.time(), lease_expires=None)
+
+    _, cleaned = run_pool(store, handler, max_attempts=3)
+    job_id = store.create({})
+    wait_for(lambda: store.get(job_id)['status'] == COMPLETED)
+    assert store.get(job_id)['attempts'] == 2
+    wait_for(lambda: len(cleaned) == 1)
+
+
+def test_job_failed_is_not_retried(store):
+    calls = []
+
+    def handler(job):
+        calls.append(job['attempts'])
+        raise JobFailed('Unsupported audio', 'not a WAV file')
+
+    run_pool(store, handler, max_attempts=3)
+    job_id = store.create({})
+    wait_for(lambda: store.get(job_id)['status'] == ERROR)
+    assert calls == [1]
+    assert store.get(job_id)['error_details'] == 'not a WAV file'
@@ -0,0 +1,58 @@
+import pytest
+
+from lao_segmenter import syllable_spans
+
+
+def segment(text):
+    return [text[start:end] for start, end in syllable_spans(text)]
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('ສວນ', ['ສວນ']),  # ວ is the vowel of a bare consonant
+    ('ຂອບໃຈ', ['ຂອບ', 'ໃຈ']),  # So is ອ
+    ('ຄວາມ', ['ຄວາມ']),  # ວ with a vowel of its own is part of the onset
+    ('ພວກເຮົາ', ['ພວກ', 'ເຮົາ']),
+    ('ຫວັງ', ['ຫວັງ']),  # ຫ + sonorant is one consonant
+])
+def test_o_and_wo_as_vowels(text, expected):
+    assert segment(text) == expected
+
+
+@pytest.mark.parametrize('text', ['ເຄີຍ', 'ເມືອງ', 'ເບື່ອ', 'ເຮືອ'])
+def test_iia_and_uea_vowels(text):
+    assert segment(text) == [text]
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('ສະບາຍດີ', ['ສະ', 'ບາຍ', 'ດີ']),
+    ('ປະຊຸມກັນຕອນບ່າຍ', ['ປະ', 'ຊຸມ', 'ກັນ', 'ຕອນ', 'ບ່າຍ']),
+    ('ກິນເຂົ້າ', ['ກິນ', 'ເຂົ້າ']),
+    ('ມື້ນີ້ອາກາດດີ', ['ມື້', 'ນີ້', 'ອາ', 'ກາດ', 'ດີ']),  # ອ starting a syllable is its consonant
+])
+def test_final_consonants(text, expected):
+    assert segment(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('ກະລຸນາ', ['ກະ', 'ລຸ', 'ນາ']),  # ະ
+    ('ຄຳຖາມ', ['ຄຳ', 'ຖາມ']),  # ຳ
+    ('ເຂົາໄປ', ['ເຂົາ', 'ໄປ']),  # ເ◌ົາ
+    ('ໃຫ້ຂ້ອຍ', ['ໃຫ້', 'ຂ້ອຍ']),  # ໃ
+    ('ເອກະສານ', ['ເອ', 'ກະ', 'ສານ']),
+])
+def test_open_endings_take_no_final_consonant(text, expected):
+    assert segment(text) == expected
+
+
+def test_repeat_mark_stays_with_its_syllable():
+    assert segment('ຫຼາຍໆ') == ['ຫຼາຍໆ']
+    assert segment('ໄປໆມາໆ') == ['ໄປໆ', 'ມາໆ']
+
+
+def test_digits_form_one_token():
+    assert segment('ປີ໒໐໒໔') == ['ປີ', '໒໐໒໔']
+
+
+def test_other_scripts_split_on_whitespace_and_lao_runs():
+    assert segment('API ສະບາຍດີ, ok') == ['API', 'ສະ', 'ບາຍ', 'ດີ', ',', 'ok']
+    assert syllable_spans('  ok ສະບາຍ') == [(2, 4), (5, 7), (7, 10)]
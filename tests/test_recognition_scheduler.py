@@ -0,0 +1,32 @@
+from recognition_scheduler import OrderedCompletions
+
+
+def test_results_are_emitted_in_job_order():
+    emitted = []
+    completions = OrderedCompletions(emitted.append)
+    first, second, third = completions.take(), completions.take(), completions.take()
+    completions.finish(third, 'c')
+    completions.finish(first, 'a')
+    assert emitted == ['a']
+    completions.finish(second, 'b')
+    assert emitted == ['a', 'b', 'c']
+
+
+def test_close_waits_for_jobs_that_finish_later():
+    emitted = []
+    completions = OrderedCompletions(emitted.append)
+    running = completions.take()
+    completions.close('final')
+    assert emitted == []
+    completions.finish(running, 'late window')
+    assert emitted == ['late window', 'final']
+    assert completions.closed
+
+
+def test_nothing_is_emitted_after_close():
+    emitted = []
+    completions = OrderedCompletions(emitted.append)
+    completions.close('final')
+    completions.finish(completions.take(), 'after close')
+    completions.close('second close')
+    assert emitted == ['final']
@@ -0,0 +1,67 @@
+import threading
+import time
+
+from streaming_audio import AudioIngestQueue
+
+CHUNKS = [b'header', b'aaaa', b'bbbb', b'cccc', b'dddd', b'eeee']
+
+
+def fill(queue):
+    for chunk in CHUNKS:
+        queue.put(chunk)
+    return queue
+
+
+def test_full_queue_merges_chunks_without_losing_bytes():
+    for policy in AudioIngestQueue.POLICIES:
+        queue = fill(AudioIngestQueue(maxsize=3, policy=policy, block_timeout=0))
+        assert b''.join(queue.get_all()) == b''.join(CHUNKS)
+        assert queue.stats()['coalesced_chunks'] > 0
+
+
+def test_header_survives_a_one_slot_queue():
+    queue = fill(AudioIngestQueue(maxsize=1, policy='drop_oldest'))
+    assert b''.join(queue.get_all()).startswith(b'header')
+
+
+def test_block_waits_for_room():
+    queue = AudioIngestQueue(maxsize=1, policy='block', block_timeout=2)
+    queue.put(b'header')
+    threading.Timer(0.1, queue.get_all).start()
+    started = time.monotonic()
+    queue.put(b'aaaa')
+    assert time.monotonic() - started < 1.5
+    assert queue.get_all() == [b'aaaa']
+    assert queue.stats()['coalesced_chunks'] == 0
+
+
+def test_block_merges_after_timeout():
+    queue = AudioIngestQueue(maxsize=1, policy='block', block_timeout=0.01)
+    queue.put(b'header')
+    queue.put(b'aaaa')
+    assert queue.get_all() == [b'header', b'aaaa']
+    assert queue.stats()['coalesced_chunks'] == 0
+
+
+def test_over_limit_counts_queued_bytes():
+    queue = AudioIngestQueue(max_queued_bytes=8)
+    queue.put(b'header')
+    assert not queue.over_limit()
+    queue.put(b'aaaa')
+    assert queue.over_limit()
+    queue.get_all()
+    assert not queue.over_limit()
+
+
+def test_drop_oldest_skips_decoded_backlog():
+    queue = AudioIngestQueue(policy='drop_oldest')
+    assert queue.backlog_start(0, 100000, 48000) == 52000
+    assert queue.stats()['dropped_samples'] == 52000
+    assert queue.backlog_start(60000, 100000, 48000) == 60000
+
+
+def test_catch_up_policies_keep_decoded_backlog():
+    for policy in ('block', 'coalesce'):
+        queue = AudioIngestQueue(policy=policy)
+        assert queue.backlog_start(0, 100000, 48000) == 0
+        assert queue.stats()['dropped_samples'] == 0
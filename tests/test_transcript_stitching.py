@@ -0,0 +1,76 @@
+from transcript_stitching import StreamingResult, TranscriptStitcher, join_tokens, tokenize
+
+
+def run_windows(hypotheses):
+    result = StreamingResult()
+    deltas = [result.update(text) for text in hypotheses]
+    deltas.append(result.finalize())
+    return result, ''.join(delta['final'] for delta in deltas if delta)
+
+
+def test_sliding_windows_keep_every_word():
+    result, text = run_windows([
+        'hello world this',
+        'world this is a',
+        'this is a test',
+        'a test of stitching'
+    ])
+    assert text == 'hello world this is a test of stitching'
+
+
+def test_words_commit_before_finalize():
+    result = StreamingResult()
+    result.update('hello world this')
+    delta = result.update('world this is a')
+    assert delta['final'] == 'hello world this'
+    assert delta['partial'] == 'is a'
+    assert result.committed_tokens == 3
+
+
+def test_revised_partial_is_replaced():
+    _, text = run_windows(['hello wold', 'hello world this'])
+    assert text == 'hello world this'
+
+
+def test_unaligned_partial_is_kept():
+    _, text = run_windows(['one two', 'three four'])
+    assert text == 'one two three four'
+
+
+def test_hypothesis_inside_committed_tail_is_new_speech():
+    stitcher = TranscriptStitcher()
+    stitcher.commit(tokenize('ສະບາຍດີ ເຈົ້າ ສະບາຍດີ ບໍ່'))
+    assert stitcher.align('ເຈົ້າ') == ([], tokenize('ເຈົ້າ'))
+
+
+def test_hypothesis_matching_committed_suffix_is_repeated():
+    stitcher = TranscriptStitcher()
+    stitcher.commit(tokenize('we need the report'))
+    repeated, new = stitcher.align('the report')
+    assert new == []
+    assert join_tokens(repeated) == 'the report'
+
+
+def test_lao_windows_join_without_spaces():
+    _, text = run_windows(['ສະບາຍດີຂອບໃຈ', 'ຂອບໃຈຫຼາຍໆ'])
+    assert text == 'ສະບາຍດີຂອບໃຈຫຼາຍໆ'
+
+
+def test_lao_after_latin_text_is_separated():
+    _, text = run_windows(['hello', 'ສະບາຍດີ'])
+    assert text == 'hello ສະບາຍດີ'
+
+
+def test_overlap_anchors_to_end_of_partial():
+    _, text = run_windows(['we need the report and the', 'the budget today'])
+    assert text == 'we need the report and the budget today'
+
+
+def test_lao_overlap_anchors_to_end_of_partial():
+    _, text = run_windows(['ກະລຸນາສົ່ງເອກະ', 'ກະສານໃຫ້ຂ້ອຍ'])
+    assert text == 'ກະລຸນາສົ່ງເອກະສານໃຫ້ຂ້ອຍ'
+
+
+def test_repeated_words_are_not_collapsed():
+    _, text = run_windows(['the the the', 'the the'])
+    assert text == 'the the the'
@@ -1,63 +1,117 @@
-from google.cloud import speech_v1p1beta1 as speech
 import os
 import numpy as np
 import wave
-import tempfile
 from scipy import signal
 import logging
 from datetime import datetime
+from recognizer_backends import GoogleCloudBackend, RecognitionError
+from voice_activity import VoiceActivityDetector
+from audio_preprocessing import HIGHPASS_CUTOFF, VOICE_BAND, VOICE_BOOST, decode_pcm_frames, preprocess_wav_blocks
+from filter_bank import get_sos
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def preprocess_audio(input_file, output_file):
-    """Preprocess audio to improve recognition accuracy"""
+SAMPLE_RATE = 16000
+MAX_SEGMENT_SECONDS = 55  # Stay below the one-minute limit of synchronous recognition
+_OFFSET_KEYS = ('start_offset', 'end_offset')  # Result timing reported by the backend
+
+def read_wav_samples(input_file):
+    """Read a WAV file as mono float32 samples in [-1, 1)
+
+    Handles 8/16/24/32-bit PCM and averages all channels. Returns
+    (samples, sample_rate, channels, source_bytes).
+    """
+    with wave.open(input_file, 'rb') as wav_file:
+        channels = wav_file.getnchannels()
+        sample_width = wav_file.getsampwidth()
+        sample_rate = wav_file.getframerate()
+        frames = wav_file.readframes(wav_file.getnframes())
+
+    return decode_pcm_frames(frames, sample_width, channels), sample_rate, channels, len(frames)
+
+def resample_to(samples, sample_rate, target_rate=SAMPLE_RATE):
+    """Polyphase resample float32 samples to target_rate"""
+    if sample_rate == target_rate:
+        return samples
+    factor = np.gcd(int(sample_rate), int(target_rate))
+    resampled = signal.resample_poly(samples, target_rate // factor, sample_rate // factor)
+    return resampled.astype(np.float32, copy=False)
+
+def preprocess_audio(input_file, output_file=None, calibrator=None, stats=None, block_seconds=None):
+    """Preprocess audio to improve recognition accuracy
+
+    The audio is down-mixed to mono and resampled to 16 kHz, then filtered
+    in float32. Returns the processed 16-bit PCM bytes, or writes a WAV file
+    and returns its path when output_file is given. If a stats dict is
+    passed it is filled with the input format and the bytes saved.
+
+    With block_seconds the file is streamed through the filters in blocks
+    of that length, so memory use does not grow with the recording.
+    """
     try:
-        # Read the original audio file
-        with wave.open(input_file, 'rb') as wav_file:
-            frames = wav_file.readframes(-1)
-            sample_rate = wav_file.getframerate()
-            audio_data = np.frombuffer(frames, dtype=np.int16)
-        
-        # Convert to float for processing
-        float_data = audio_data.astype(np.float32)
+        if block_seconds:
+            return preprocess_wav_blocks(input_file, output_file, calibrator, stats, block_seconds)
+
+        # Read the original audio as mono and bring it to the recognizer rate
+        samples, source_rate, channels, source_bytes = read_wav_samples(input_file)
+        float_data = resample_to(samples, source_rate)
+        sample_rate = SAMPLE_RATE
         
         # 1. Normalize volume to optimal level
-        max_val = np.max(np.abs(float_data))
+        max_val = np.max(np.abs(float_data)) if len(float_data) else 0
         if max_val > 0:
-            target_level = 32767 * 0.8
-            normalized = float_data * (target_level / max_val)
+            target_level = 0.8
+            normalized = float_data * np.float32(target_level / max_val)
         else:
             normalized = float_data
         
         # 2. Apply high-pass filter to remove low-frequency noise
         nyquist = sample_rate / 2
-        low_cutoff = 80 / nyquist
-        if low_cutoff < 1.0:
-            b, a = signal.butter(4, low_cutoff, btype='high')
-            filtered = signal.filtfilt(b, a, normalized)
+        if HIGHPASS_CUTOFF < nyquist:
+            sos = get_sos('highpass', 4, HIGHPASS_CUTOFF, sample_rate)
+            filtered = signal.sosfiltfilt(sos, normalized).astype(np.float32)
         else:
             filtered = normalized
         
         # 3. Enhance voice frequencies (300-3400 Hz)
-        voice_low = 300 / nyquist
-        voice_high = 3400 / nyquist
-        if voice_low < 1.0 and voice_high < 1.0:
-            b, a = signal.butter(4, [voice_low, voice_high], btype='band')
-            voice_enhanced = signal.filtfilt(b, a, filtered)
-            enhanced = filtered + (voice_enhanced * 0.3)
+        if VOICE_BAND[1] < nyquist:
+            sos = get_sos('bandpass', 4, VOICE_BAND, sample_rate)
+            voice_enhanced = signal.sosfiltfilt(sos, filtered).astype(np.float32)
+            enhanced = filtered + (voice_enhanced * np.float32(VOICE_BOOST))
         else:
             enhanced = filtered
         
+        # 4. Apply calibrated noise reduction (calibrator works on [-1, 1] samples)
+        if calibrator is not None:
+            enhanced = np.asarray(calibrator.apply_noise_reduction(enhanced), dtype=np.float32)
+        
         # Convert back to int16
-        processed_audio = enhanced.astype(np.int16)
+        processed_audio = np.clip(enhanced * np.float32(32768.0), -32768, 32767).astype(np.int16)
+        
+        output_bytes = processed_audio.nbytes
+        logger.info(
+            f"Preprocessed {channels}ch {source_rate} Hz audio to mono {sample_rate} Hz: "
+            f"{source_bytes} -> {output_bytes} bytes"
+        )
+        if stats is not None:
+            stats.update({
+                'source_sample_rate': source_rate,
+                'source_channels': channels,
+                'source_bytes': source_bytes,
+                'output_bytes': output_bytes,
+                'bytes_saved': source_bytes - output_bytes
+            })
+        
+        if output_file is None:
+            return processed_audio.tobytes()
         
         # Save processed audio
         with wave.open(output_file, 'wb') as wav_file:
             wav_file.setnchannels(1)
             wav_file.setsampwidth(2)
-            wav_file.setframerate(16000)
+            wav_file.setframerate(sample_rate)
             wav_file.writeframes(processed_audio.tobytes())
         
         logger.info(f"Audio preprocessed and saved to {output_file}")
@@ -65,41 +119,63 @@ def preprocess_audio(input_file, output_file):
         
     except Exception as e:
         logger.error(f"Error preprocessing audio: {e}")
-        return input_file
+        if output_file is not None:
+            return input_file
+        # Fall back to the unprocessed file contents
+        with open(input_file, 'rb') as f:
+            return f.read()
+
+def transcribe_audio_final(file_path, show_alternatives=False, calibrator=None, phrase_dict=None, backend=None,
+                           max_segment_seconds=MAX_SEGMENT_SECONDS, max_workers=4, block_seconds=None,
+                           raise_errors=False):
+    """Final transcription with clean output
 
-def transcribe_audio_final(file_path, show_alternatives=False):
-    """Final transcription with clean output"""
+    Long recordings are cut into segments of at most max_segment_seconds at
+    pauses found by voice activity detection, and up to max_workers segments
+    are recognized at once. block_seconds enables block-wise preprocessing.
+    backend is any RecognizerBackend; Google Cloud Speech-to-Text by default.
+    With raise_errors, recognition service failures propagate instead of
+    returning None, so callers can tell them apart from silent audio.
+    """
     
     if not os.path.exists(file_path):
         print(f"Error: File {file_path} does not exist.")
         return None
 
-    # Preprocess audio
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-        processed_file = preprocess_audio(file_path, temp_file.name)
-
     try:
-        # Initialize Speech client
-        client = speech.SpeechClient()
+        # Preprocess audio in memory
+        preprocessing = {}
+        content = preprocess_audio(file_path, calibrator=calibrator, stats=preprocessing, block_seconds=block_seconds)
 
-        # Read processed audio
-        with open(processed_file, "rb") as audio_file:
-            content = audio_file.read()
+        if backend is None:
+            backend = GoogleCloudBackend()
 
-        # Configure recognition
-        audio = speech.RecognitionAudio(content=content)
-        config = speech.RecognitionConfig(
-            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-            sample_rate_hertz=16000,
-            language_code="lo-LA",
-            enable_automatic_punctuation=True,
+        # Split at pauses; silent stretches are never sent for recognition
+        samples = np.frombuffer(content, dtype=np.int16, count=len(content) // 2)
+        bounds = VoiceActivityDetector(sample_rate=SAMPLE_RATE).segments(
+            samples, max_segment_seconds * SAMPLE_RATE)
+        if not bounds:
+            # Nothing stood out from the background level (e.g. speech with no
+            # pauses at all), so fall back to fixed-length segments
+            step = max_segment_seconds * SAMPLE_RATE
+            bounds = [(start, min(start + step, len(samples))) for start in range(0, len(samples), step)]
+        logger.info(f"Recognizing {len(samples) / SAMPLE_RATE:.1f}s of audio in {len(bounds)} segments")
+
+        # Perform transcription; results come back in segment order
+        segment_results = backend.recognize_batch(
+            [samples[start:end] for start, end in bounds],
+            sample_rate=SAMPLE_RATE,
+            language="lo-LA",
             max_alternatives=3,
+            max_workers=max_workers
         )
+        results = [
+            result
+            for (start, end), segment in zip(bounds, segment_results)
+            for result in _timed_results(segment, start / SAMPLE_RATE, end / SAMPLE_RATE)
+        ]
 
-        # Perform transcription
-        response = client.recognize(config=config, audio=audio)
-
-        if not response.results:
+        if not results:
             print("No transcription results. The audio might be silent or unclear.")
             return None
 
@@ -107,43 +183,74 @@ def transcribe_audio_final(file_path, show_alternatives=False):
         final_transcript = []
         all_alternatives = []
         
-        for result in response.results:
+        for alternatives, start_time, end_time in results:
             best_alternative = None
             segment_alternatives = []
             
-            for alternative in result.alternatives:
-                segment_alternatives.append({
-                    'text': alternative.transcript,
-                    'confidence': alternative.confidence
-                })
+            for alternative in alternatives:
+                alternative = {key: value for key, value in alternative.items() if key not in _OFFSET_KEYS}
+                segment_alternatives.append(alternative)
                 
                 # Select best alternative (highest confidence)
-                if best_alternative is None or alternative.confidence > best_alternative['confidence']:
-                    best_alternative = {
-                        'text': alternative.transcript,
-                        'confidence': alternative.confidence
-                    }
+                if best_alternative is None or alternative['confidence'] > best_alternative['confidence']:
+                    best_alternative = dict(alternative)
             
             if best_alternative:
+                best_alternative['start_time'] = start_time
+                best_alternative['end_time'] = end_time
                 final_transcript.append(best_alternative)
                 all_alternatives.append(segment_alternatives)
 
-        return {
+        raw_result = {
             'final_text': ' '.join([seg['text'] for seg in final_transcript]),
             'segments': final_transcript,
-            'all_alternatives': all_alternatives if show_alternatives else None,
-            'average_confidence': sum(seg['confidence'] for seg in final_transcript) / len(final_transcript) if final_transcript else 0
+            'all_alternatives': all_alternatives,
+            'average_confidence': sum(seg['confidence'] for seg in final_transcript) / len(final_transcript) if final_transcript else 0,
+            'preprocessing': preprocessing
         }
+        return finalize_result(raw_result, show_alternatives, phrase_dict)
 
     except Exception as e:
+        if raise_errors and isinstance(e, RecognitionError):
+            raise
         print(f"Error during transcription: {e}")
         return None
-    
-    finally:
-        try:
-            os.unlink(processed_file)
-        except:
-            pass
+
+def _timed_results(segment, start_time, end_time):
+    """(alternatives, start, end) for each recognizer result of one VAD segment
+
+    Results carry offsets from the start of the segment where the backend
+    reports them; otherwise they span the whole segment.
+    """
+    timed = []
+    for alternatives in segment:
+        timing = alternatives[0] if alternatives else {}
+        result_start = start_time + timing['start_offset'] if 'start_offset' in timing else start_time
+        result_end = start_time + timing['end_offset'] if 'end_offset' in timing else end_time
+        timed.append((alternatives, min(result_start, end_time), min(result_end, end_time)))
+    return timed
+
+def finalize_result(result, show_alternatives=False, phrase_dict=None):
+    """Apply per-request options to a transcription result
+
+    Phrase corrections and the alternatives switch do not change what the
+    recognizer returns, so a raw result (all alternatives, no corrections)
+    can be cached and finished with any options later.
+    """
+    segments = []
+    for segment in result['segments']:
+        segment = dict(segment)
+        # Apply phrase dictionary corrections to the selected text
+        if phrase_dict is not None:
+            segment['text'], _ = phrase_dict.correct_text(segment['text'])
+        segments.append(segment)
+
+    return dict(
+        result,
+        final_text=' '.join(seg['text'] for seg in segments),
+        segments=segments,
+        all_alternatives=result['all_alternatives'] if show_alternatives else None
+    )
 
 def save_final_result(result, output_file="final_transcript.txt", show_alternatives=False):
     """Save clean final transcription result"""
@@ -182,7 +289,7 @@ def save_final_result(result, output_file="final_transcript.txt", show_alternati
                 f.write("=" * 50 + "\n\n")
                 
                 for i, segment in enumerate(result['segments'], 1):
-                    f.write(f"Segment {i}:\n")
+                    f.write(f"Segment {i} [{segment['start_time']:.1f}s - {segment['end_time']:.1f}s]:\n")
                     f.write(f"Text: {segment['text']}\n")
                     f.write(f"Confidence: {segment['confidence']:.1%}\n")
                     
@@ -0,0 +1,188 @@
+"""
+Overlap-aware stitching of sliding-window transcripts
+"""
+import re
+import string
+from collections import deque
+
+from lao_segmenter import LAO, syllable_spans
+
+_EDGE_PUNCTUATION = string.punctuation + '“”‘’…«»'
+_LAO_PATTERN = re.compile(f'[{LAO}]')
+
+
+def tokenize(text):
+    """Split text into (key, surface) tokens
+
+    Tokens are words, or syllables of Lao script, which has no spaces
+    between words. The key is the normalized form used for alignment; the
+    surface keeps the original characters including leading whitespace, so
+    joining surfaces reproduces the text exactly.
+    """
+    tokens = []
+    previous_end = 0
+    for _, end in syllable_spans(text):
+        surface = text[previous_end:end]
+        previous_end = end
+        stripped = surface.strip()
+        key = stripped.strip(_EDGE_PUNCTUATION).lower() or stripped
+        tokens.append((key, surface))
+    return tokens
+
+
+def join_tokens(tokens):
+    """Rebuild text from (key, surface) tokens"""
+    return ''.join(surface for _, surface in tokens).strip()
+
+
+class TranscriptStitcher:
+    """Aligns each window hypothesis with the committed transcript tail
+
+    Consecutive windows share `overlap` seconds of audio, so the start of a
+    new hypothesis normally repeats the end of what was already emitted. The
+    stitcher finds the longest run of committed tail tokens that reappears
+    at the start of the hypothesis (allowing a few garbled tokens at the
+    window cut) and returns only what follows it. Only the last max_overlap
+    committed tokens are ever compared, so the cost depends on the overlap,
+    not on how long the session has been running.
+    """
+
+    def __init__(self, max_overlap=24, max_skip=2, min_skip_match=2, tokenizer=tokenize):
+        self.max_overlap = max_overlap
+        self.max_skip = max_skip
+        self.min_skip_match = min_skip_match
+        self.tokenizer = tokenizer
+        self.tail = deque(maxlen=max_overlap)
+
+    def _new_token_start(self, keys):
+        """Index of the first hypothesis token not already in the committed tail"""
+        tail = list(self.tail)
+        if not tail or not keys:
+            return 0
+
+        # Longest committed suffix that matches the hypothesis after skipping a
+        # few leading tokens cut off at the window boundary; a hypothesis that
+        # is entirely such a suffix only repeats committed audio
+        count = len(keys)
+        best_skip, best_length = 0, 0
+        for skip in range(min(self.max_skip, count - 1) + 1):
+            shortest = 1 if skip == 0 else self.min_skip_match
+            for length in range(min(len(tail), count - skip), max(best_length, shortest - 1), -1):
+                if tail[-length:] == keys[skip:skip + length]:
+                    best_skip, best_length = skip, length
+                    break
+
+        return best_skip + best_length if best_length else 0
+
+    def align(self, text):
+        """Split a hypothesis into (repeated tokens, new tokens) without committing"""
+        tokens = self.tokenizer(text)
+        start = self._new_token_start([key for key, _ in tokens])
+        return tokens[:start], tokens[start:]
+
+    def commit(self, tokens):
+        """Append tokens to the committed tail"""
+        self.tail.extend(key for key, _ in tokens)
+
+
+class StreamingResult:
+    """Committed final transcript plus one mutable partial tail
+
+    Each window hypothesis is aligned against the committed text and then
+    against the partial tail. Partial tokens before the point where the new
+    window starts are no longer covered by any window and get committed, as
+    do the tokens on which the partial and the new hypothesis agree; the
+    rest of the hypothesis becomes the new partial. finalize() commits the
+    whole partial when the speaker pauses or the session ends. Every change
+    is reported as a sequence-numbered delta: the text to append to the final
+    transcript and the replacement partial text. Committed text is never
+    revised, so clients only ever append finals and replace the partial.
+    """
+
+    def __init__(self, stitcher=None):
+        self.stitcher = stitcher or TranscriptStitcher()
+        self.partial = []
+        self.seq = 0
+        self.committed_tokens = 0
+
+    def _commit(self, tokens):
+        self.stitcher.commit(tokens)
+        self.committed_tokens += len(tokens)
+        surface = ''.join(surface for _, surface in tokens)
+        # The very first committed text needs no separator
+        return surface.lstrip() if self.committed_tokens == len(tokens) else surface
+
+    def _delta(self, final_text, previous_partial):
+        partial_text = join_tokens(self.partial)
+        if not final_text and partial_text == previous_partial:
+            return None
+        self.seq += 1
+        return {
+            'seq': self.seq,
+            'final': final_text,
+            'partial': partial_text,
+            'committed_tokens': self.committed_tokens
+        }
+
+    def _partial_overlap(self, keys):
+        """Where a hypothesis starts inside the partial tail
+
+        Returns (start, skip, length) such that keys[skip:skip + length]
+        repeats partial[start:start + length]. The repeated run must reach
+        the end of the partial, so no partial token after it is dropped;
+        the longest such run wins. Up to max_skip leading hypothesis tokens
+        may be garbled by the window cut. Failing that, a hypothesis that
+        starts like the partial covers the same audio and supersedes it
+        after their common prefix; otherwise it starts after the partial.
+        """
+        partial = [key for key, _ in self.partial]
+        best = (len(partial), 0, 0)
+        for skip in range(min(self.stitcher.max_skip, len(keys) - 1) + 1):
+            shortest = 1 if skip == 0 else self.stitcher.min_skip_match
+            for start in range(len(partial) - max(best[2], shortest - 1)):
+                length = len(partial) - start
+                if partial[start:] == keys[skip:skip + length]:
+                    best = (start, skip, length)
+                    break
+        if best[2]:
+            return best
+
+        length = 0
+        while length < min(len(partial), len(keys)) and partial[length] == keys[length]:
+            length += 1
+        return (0, 0, length) if length else best
+
+    def update(self, text, overlaps=True):
+        """Apply a window hypothesis; returns a delta or None if nothing changed"""
+        previous_partial = join_tokens(self.partial)
+
+        if overlaps:
+            repeated, candidate = self.stitcher.align(text)
+            if not candidate:
+                # The window only repeats committed text
+                return None
+            start, skip, stable = self._partial_overlap([key for key, _ in candidate])
+        else:
+            # Nothing can revise the old partial any more
+            repeated, candidate = [], self.stitcher.tokenizer(text)
+            start, skip, stable = len(self.partial), 0, 0
+
+        # The first word of a hypothesis needs a separator from what precedes
+        # it, except within Lao script, which is written without spaces
+        if candidate and not repeated and skip == 0 and not candidate[0][1][:1].isspace():
+            key, surface = candidate[0]
+            previous = self.partial[start - 1][0] if start else (self.stitcher.tail[-1] if self.stitcher.tail else '')
+            if not (_LAO_PATTERN.search(previous[-1:]) and _LAO_PATTERN.match(surface)):
+                candidate[0] = (key, ' ' + surface)
+        # Partial tokens before the overlap point have left the window, and
+        # tokens both hypotheses agree on are stable
+        final_text = self._commit(self.partial[:start] + candidate[skip:skip + stable])
+        self.partial = candidate[skip + stable:]
+        return self._delta(final_text, previous_partial)
+
+    def finalize(self):
+        """Commit the partial tail; returns a delta or None if it was empty"""
+        previous_partial = join_tokens(self.partial)
+        final_text = self._commit(self.partial)
+        self.partial = []
+        return self._delta(final_text, previous_partial)
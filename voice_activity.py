@@ -0,0 +1,137 @@
+"""
+Frame-level voice activity detection on decoded 16-bit PCM
+"""
+import numpy as np
+
+
+class VoiceActivityDetector:
+    """Energy plus zero-crossing voice activity detector
+
+    Audio is cut into fixed frames and classified in one vectorized pass:
+    frames well above the running noise floor are voiced speech, and
+    quieter frames with a high zero-crossing rate are kept as unvoiced
+    consonants. A short hangover keeps word endings attached to speech.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=30, energy_margin_db=9.0,
+                 min_energy_db=35.0, unvoiced_margin_db=4.0, zcr_threshold=0.25,
+                 hangover_ms=240, noise_adaptation=0.1):
+        self.sample_rate = sample_rate
+        self.frame_length = int(sample_rate * frame_ms / 1000)
+        self.energy_margin_db = energy_margin_db
+        self.min_energy_db = min_energy_db
+        self.unvoiced_margin_db = unvoiced_margin_db
+        self.zcr_threshold = zcr_threshold
+        self.hangover_frames = max(1, int(hangover_ms / frame_ms))
+        self.noise_adaptation = noise_adaptation
+        self.noise_floor_db = None
+
+    def frame_features(self, samples):
+        """Return per-frame energy (dB re 1 LSB) and zero-crossing rate"""
+        frame_count = len(samples) // self.frame_length
+        if frame_count == 0:
+            return np.empty(0, dtype=np.float32), np.empty(0, dtype=np.float32)
+
+        frames = np.asarray(samples[:frame_count * self.frame_length], dtype=np.float32)
+        frames = frames.reshape(frame_count, self.frame_length)
+
+        energy_db = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1.0)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (self.frame_length - 1)
+        return energy_db, zcr.astype(np.float32)
+
+    def update_noise_floor(self, samples, energy_db=None):
+        """Track the background level from the quietest frames of new audio"""
+        if energy_db is None:
+            energy_db, _ = self.frame_features(samples)
+        if len(energy_db) == 0:
+            return self.noise_floor_db
+
+        quiet_level = float(np.percentile(energy_db, 10))
+        if self.noise_floor_db is None:
+            self.noise_floor_db = quiet_level
+        elif quiet_level < self.noise_floor_db:
+            # Drop quickly when it gets quieter, rise slowly during long speech
+            self.noise_floor_db = quiet_level
+        else:
+            self.noise_floor_db += self.noise_adaptation * (quiet_level - self.noise_floor_db)
+        return self.noise_floor_db
+
+    def speech_mask(self, samples):
+        """Classify each frame of samples as speech (True) or silence"""
+        energy_db, zcr = self.frame_features(samples)
+        if len(energy_db) == 0:
+            return np.zeros(0, dtype=bool)
+
+        noise_floor = self.noise_floor_db
+        if noise_floor is None:
+            noise_floor = float(np.percentile(energy_db, 10))
+        threshold = max(noise_floor + self.energy_margin_db, self.min_energy_db)
+
+        voiced = energy_db > threshold
+        unvoiced = (energy_db > threshold - self.unvoiced_margin_db) & (zcr > self.zcr_threshold)
+        mask = voiced | unvoiced
+
+        # Hangover: extend every speech frame forward so endings are not clipped
+        if self.hangover_frames > 1 and mask.any():
+            extended = np.convolve(mask.astype(np.int8), np.ones(self.hangover_frames, dtype=np.int8))
+            mask = extended[:len(mask)] > 0
+        return mask
+
+    def speech_bounds(self, samples, padding_ms=120, min_speech_ratio=0.0):
+        """Return (start, end) sample offsets snapped to the first speech onset
+        and last speech offset, or None when the audio holds too little speech"""
+        mask = self.speech_mask(samples)
+        speech_frames = np.flatnonzero(mask)
+        if len(speech_frames) == 0 or len(speech_frames) < min_speech_ratio * len(mask):
+            return None
+
+        padding = int(self.sample_rate * padding_ms / 1000)
+        start = max(0, int(speech_frames[0]) * self.frame_length - padding)
+        end = min(len(samples), (int(speech_frames[-1]) + 1) * self.frame_length + padding)
+        return start, end
+
+    def segments(self, samples, max_segment_samples, min_silence_ms=300, padding_ms=120):
+        """Split audio into speech segments of at most max_segment_samples
+
+        Speech runs separated by at least min_silence_ms of silence are
+        packed greedily into segments, so cuts fall in pauses. A single run
+        longer than the limit is cut at its quietest frame in the second
+        half of the allowed length. Stretches without speech are left out.
+        Returns (start, end) sample offsets in order.
+        """
+        energy_db, _ = self.frame_features(samples)
+        mask = self.speech_mask(samples)
+        speech = np.flatnonzero(mask)
+        if len(speech) == 0:
+            return []
+
+        frame = self.frame_length
+        max_frames = max(1, int(max_segment_samples) // frame)
+        min_silence = max(1, int(min_silence_ms / 1000 * self.sample_rate) // frame)
+        padding = int(padding_ms / 1000 * self.sample_rate) // frame
+
+        gaps = np.flatnonzero(np.diff(speech) > min_silence)
+        run_starts = np.concatenate(([speech[0]], speech[gaps + 1]))
+        run_ends = np.concatenate((speech[gaps] + 1, [speech[-1] + 1]))
+
+        bounds = []
+        current = None
+        for start, end in zip(run_starts, run_ends):
+            start = max(int(start) - padding, current[1] if current else 0)
+            end = min(int(end) + padding, len(mask))
+            if current is not None and end - current[0] <= max_frames:
+                current[1] = end
+                continue
+            if current is not None:
+                bounds.append(tuple(current))
+
+            while end - start > max_frames:
+                low = start + max_frames // 2
+                cut = low + int(np.argmin(energy_db[low:start + max_frames])) + 1
+                bounds.append((start, cut))
+                start = cut
+            current = [start, end]
+        bounds.append(tuple(current))
+
+        return [(start * frame, min(end * frame, len(samples))) for start, end in bounds]
@@ -1,31 +1,39 @@
 from flask import Flask, render_template, request, jsonify, send_file, flash, redirect, url_for, make_response, session
-from flask_socketio import SocketIO, emit
+from flask_socketio import SocketIO, emit, join_room, leave_room
 import os
 import tempfile
 import uuid
 from datetime import datetime, timedelta
-from werkzeug.utils import secure_filename
 import threading
 import time
 import logging
-from transcribe_final import transcribe_audio_final
+from transcribe_final import finalize_result, transcribe_audio_final
 from mic_calibration import MicrophoneCalibrator
 from phrase_dictionary import PhraseDictionary
+from voice_activity import VoiceActivityDetector
+from recognition_scheduler import OrderedCompletions, RecognitionScheduler
+from transcript_stitching import StreamingResult
+from recognizer_backends import NoSpeechError, RecognitionError, create_backend
+from speech_client_pool import get_client_pool
+from job_store import JobFailed, JobStore, JobWorkerPool, COMPLETED, ERROR, PROCESSING
+from result_cache import ResultCache, wav_content_hash
+from janitor import Janitor, directory_size, prune_directory
+from audio_preprocessing import BlockPreprocessor
+from streaming_audio import AudioIngestQueue, IncrementalDecoder, PCMRingBuffer, decode_audio, TARGET_SAMPLE_RATE
 from docx import Document
 from docx.shared import Pt, RGBColor
 from docx.enum.text import WD_ALIGN_PARAGRAPH
 import html2text
 import pdfkit
 import json
-import speech_recognition as sr
 import wave
 import numpy as np
 from pydub import AudioSegment
 import sys
 import io
 import base64
-import queue
 import threading
+import functools
 from collections import deque
 
 # Configure ffmpeg path
@@ -211,319 +219,316 @@ def get_user_tier_info(user_id):
 
 # Initialize global objects
 calibrator = MicrophoneCalibrator()
-phrase_dict = PhraseDictionary()
-
-# Store processing status
-processing_status = {}
+phrase_dict = PhraseDictionary(
+    flush_every=app.config['PHRASE_FLUSH_UPDATES'],
+    flush_interval=app.config['PHRASE_FLUSH_SECONDS'],
+    lookup=app.config['PHRASE_LOOKUP']
+)
 
 # Store real-time transcription sessions
 streaming_sessions = {}
 session_start_times = {}  # Track session start times for usage calculation
+session_owners = {}  # Socket.IO sid -> ids of the streaming sessions it started
+
+# Fixed worker pool shared by all streaming sessions
+recognition_scheduler = RecognitionScheduler(
+    num_workers=app.config['STREAMING_WORKERS'],
+    max_inflight_per_session=app.config['STREAMING_MAX_INFLIGHT_PER_SESSION']
+)
+
+# Recognition services, chosen by config (the fake backend needs no network)
+recognizer_backend = create_backend(app.config['RECOGNIZER_BACKEND'], app.config)
+batch_recognizer_backend = create_backend(app.config['BATCH_RECOGNIZER_BACKEND'], app.config)
 
 ALLOWED_EXTENSIONS = {'wav', 'mp3', 'mp4', 'm4a', 'flac', 'ogg'}
+EXPORT_DIR_PREFIX = 'speech2text-export-'  # Lets the janitor find old export temp dirs
 
 class StreamingTranscriber:
-    """Handles real-time audio transcription with improved buffering"""
+    """Handles real-time audio transcription with improved buffering
 
-    def __init__(self, session_id, use_calibration=False, use_phrases=False):
+    A session owns no thread: the shared recognition_scheduler calls
+    next_job() to ingest queued audio and pick the next window, then runs
+    the returned job on one of its workers.
+    """
+
+    _FINALIZE = object()  # Marks where the partial is finalized in the emit order
+
+    def __init__(self, session_id, owner_sid=None, user_id=None, use_calibration=False, use_phrases=False):
         self.session_id = session_id
+        self.owner_sid = owner_sid  # Results go only to the client's own room
+        self.user_id = user_id  # Usage is charged to this user when the session ends
         self.use_calibration = use_calibration
         self.use_phrases = use_phrases
-        self.audio_queue = queue.Queue()
+        self.audio_queue = AudioIngestQueue(
+            maxsize=app.config['STREAMING_QUEUE_SIZE'],
+            policy=app.config['STREAMING_QUEUE_POLICY'],
+            block_timeout=app.config['STREAMING_QUEUE_BLOCK_TIMEOUT'],
+            max_queued_bytes=app.config['STREAMING_QUEUE_MAX_KB'] * 1024
+        )
+        self.backpressure_active = False
+        self.backpressure_since = 0.0
+        self.backpressure_hold = 5.0  # Minimum seconds before releasing backpressure
         self.is_active = True
-        self.recognizer = sr.Recognizer()
+        self._lock = threading.Lock()
 
-        # Enhanced buffering system with sliding window
-        self.audio_buffer = deque(maxlen=25)  # Larger buffer for sliding window
-        self.processed_chunks = set()  # Track processed chunks to avoid duplicates
+        # One decoder per session: each compressed chunk is decoded exactly once
+        self.decoder = IncrementalDecoder(on_output=lambda: recognition_scheduler.notify(session_id))
+
+        # Preallocated ring buffer of decoded samples for sample-accurate windows
+        rate = self.decoder.sample_rate
+        self.audio_buffer = PCMRingBuffer(rate * 8)  # Keep the last 8 seconds of audio
         self.chunk_counter = 0
         self.last_transcription_time = time.time()
-        self.transcription_history = deque(maxlen=8)  # More history for better duplicate detection
-
-        # Sliding window parameters
-        self.window_size = 4  # Number of chunks in each processing window
-        self.slide_step = 1   # How many chunks to slide the window
-        self.last_processed_position = 0  # Track where we last processed
+        self.last_activity = time.time()  # Last audio received; idle sessions are ended by the janitor
+        self.result = StreamingResult()  # Committed transcript plus a revisable partial tail
+        self.last_emitted_end = 0  # Sample where the last stitched window ended
+        self.last_confidence = 0.0
+        self._partial_open = False  # Recognized windows since the partial was last finalized
+
+        # Sliding window parameters (absolute sample positions)
+        self.window_samples = rate  # 1 second in each processing window
+        self.slide_samples = rate // 4  # New audio needed to slide the window
+        self.last_processed_position = 0  # Sample where the last window ended
+        self.skipped_samples = 0  # Decoded samples overwritten before any window covered them
 
         # Enhanced processing parameters for better word capture
-        self.min_chunks_for_processing = 2  # Reduced minimum for faster processing
-        self.max_chunks_for_processing = 6  # Reduced maximum to prevent delays
-        self.overlap_chunks = 3  # Increased overlap for better continuity
+        self.min_samples_for_processing = rate // 2  # Shortest window flushed during silence
+        self.max_samples_for_processing = rate * 3  # Longest window; a backlog takes several
+        self.overlap_samples = rate * 3 // 4  # Context carried into the next window
         self.silence_threshold = 1.5  # Reduced silence threshold for faster response
         self.processing_interval = 0.5  # Process every 500ms minimum
 
+        # Windows may be recognized concurrently; results are emitted in order
+        self._completions = OrderedCompletions(self._emit_result)
+
+        # Voice activity gating - silent windows never reach the recognizer
+        self.vad = VoiceActivityDetector(sample_rate=rate)
+        self.min_speech_ratio = 0.1  # Fraction of speech frames needed to recognize a window
+        self.skipped_windows = 0
+
+        # Calibrated sessions run decoded audio through the same block filters as uploads
+        self.preprocessor = BlockPreprocessor.from_calibrator(calibrator, sample_rate=rate) if use_calibration else None
+
         # Audio quality monitoring
         self.audio_quality_scores = deque(maxlen=10)
         self.low_quality_count = 0
 
-        # Optimize speech recognition for Lao language
-        self.recognizer.energy_threshold = 300  # Lower threshold for better sensitivity
-        self.recognizer.dynamic_energy_threshold = True
-        self.recognizer.dynamic_energy_adjustment_damping = 0.15
-        self.recognizer.pause_threshold = 0.8  # Shorter pause detection for Lao speech patterns
-        self.recognizer.phrase_threshold = 0.3  # Adjust for Lao phrase boundaries
-        self.recognizer.non_speaking_duration = 0.5  # Shorter non-speaking duration
-
-        # Apply calibration settings if available (override defaults)
-        if use_calibration and hasattr(calibrator, 'settings'):
-            settings = calibrator.settings
-            if 'noise_threshold' in settings:
-                self.recognizer.energy_threshold = settings['noise_threshold'] * 1000
-            if 'gain' in settings:
-                # Adjust dynamic energy threshold based on gain
-                self.recognizer.dynamic_energy_threshold = True
-                self.recognizer.dynamic_energy_adjustment_damping = 0.15
-
-        # Start processing thread
-        self.processing_thread = threading.Thread(target=self._process_audio_stream)
-        self.processing_thread.daemon = True
-        self.processing_thread.start()
+        # Hand the session to the shared worker pool
+        recognition_scheduler.register(self)
 
     def add_audio_chunk(self, audio_data):
-        """Add audio chunk to processing queue"""
+        """Add audio chunk to the bounded processing queue"""
         if self.is_active:
+            self.last_activity = time.time()
             self.audio_queue.put(audio_data)
-
-    def _process_audio_stream(self):
-        """Process audio chunks in real-time with adaptive timing"""
-        while self.is_active:
-            try:
-                # Get audio chunk with timeout
-                audio_data = self.audio_queue.get(timeout=1.0)
-                self.chunk_counter += 1
-
-                # Add to buffer with quality assessment
-                self.audio_buffer.append(audio_data)
-                self._assess_audio_quality(audio_data)
-
-                # Sliding window processing logic for continuous coverage
-                current_time = time.time()
-                time_since_last = current_time - self.last_transcription_time
-                buffer_size = len(self.audio_buffer)
-
-                should_process = False
-
-                # Sliding window approach - process overlapping segments
-                if buffer_size >= self.window_size:
-                    # Check if we have enough new chunks to slide the window
-                    new_chunks_available = buffer_size - self.last_processed_position
-
-                    if new_chunks_available >= self.slide_step:
-                        should_process = True
-                    # Also process based on time to handle silence
-                    elif time_since_last >= self.processing_interval:
-                        should_process = True
-                    # Emergency processing if buffer is getting full
-                    elif buffer_size >= self.max_chunks_for_processing:
-                        should_process = True
-
-                if should_process:
-                    self._transcribe_sliding_window()
-                    self.last_transcription_time = current_time
-
-            except queue.Empty:
-                # Check if we should process accumulated chunks during silence
-                if len(self.audio_buffer) >= self.min_chunks_for_processing:
-                    current_time = time.time()
-                    if current_time - self.last_transcription_time >= self.silence_threshold:
-                        self._transcribe_chunk()
-                        self.last_transcription_time = current_time
-                continue
-            except Exception as e:
-                logger.error(f"Error in streaming transcription: {str(e)}")
-                socketio.emit('transcription_error', {
-                    'error': str(e),
-                    'session_id': self.session_id
-                })
-
-    def _transcribe_chunk(self):
-        """Transcribe accumulated audio chunks with overlap and duplicate detection"""
+            if self.audio_queue.over_limit():
+                # Workers are not keeping up; decode here so queued bytes stay bounded
+                with self._lock:
+                    self._ingest_audio()
+            recognition_scheduler.notify(self.session_id)
+
+            # Ask the client to send larger, less frequent chunks while we catch up
+            if not self.backpressure_active and self.audio_queue.qsize() >= self.audio_queue.maxsize * 3 // 4:
+                self._set_backpressure(True)
+
+    def _set_backpressure(self, active):
+        """Tell the client to slow down (or resume) sending audio"""
+        self.backpressure_active = active
+        self.backpressure_since = time.time()
+        socketio.emit('backpressure', dict(self.audio_queue.stats(), **{
+            'session_id': self.session_id,
+            'active': active,
+            'suggested_timeslice_ms': 1000 if active else 250
+        }), to=self.owner_sid)
+
+    def queue_stats(self):
+        """Ingest queue depth and backlog counters, plus audio never recognized"""
+        return dict(self.audio_queue.stats(), skipped_samples=self.skipped_samples)
+
+    def _collect_decoded_audio(self):
+        """Move PCM produced by the decoder into the sliding window buffer"""
+        pcm = self.decoder.drain()
+        if pcm:
+            samples = np.frombuffer(pcm, dtype=np.int16)
+            self._assess_audio_quality(samples)
+            if self.preprocessor is not None:
+                samples = self.preprocessor.process_pcm(samples)
+            self.audio_buffer.write(samples)
+
+    def _ingest_audio(self):
+        """Decode queued chunks once, in arrival order, and buffer the PCM"""
+        for audio_data in self.audio_queue.get_all():
+            self.chunk_counter += 1
+            self.decoder.feed(audio_data)
+        self._collect_decoded_audio()
+
+        # Release once the queue has drained and stayed drained for a while
+        if self.backpressure_active and time.time() - self.backpressure_since >= self.backpressure_hold:
+            self._set_backpressure(False)
+
+    def _window_start(self, end, min_length):
+        """First sample of a window ending at `end` that covers all unprocessed audio"""
+        start = min(end - min_length, self.last_processed_position - self.overlap_samples)
+        return max(start, end - self.max_samples_for_processing, self.audio_buffer.start_position)
+
+    def _catch_up_end(self):
+        """Latest end of the next window that still leaves no unprocessed audio out"""
+        start = max(self.last_processed_position, self.audio_buffer.start_position)
+        return start + self.max_samples_for_processing - self.overlap_samples
+
+    def _speech_window(self, start, end):
+        """Snap [start, end) to speech onset/offset
+
+        Returns (samples, speech_start, speech_end) in absolute sample
+        positions, or None if the window is silent. The samples are copied
+        out of the ring buffer, which keeps being written while the window
+        is recognized on a worker.
+        """
+        window = self.audio_buffer.view(start, end)
+        bounds = self.vad.speech_bounds(window, min_speech_ratio=self.min_speech_ratio)
+        if bounds is None:
+            self.skipped_windows += 1
+            return None
+        return np.array(window[bounds[0]:bounds[1]]), start + bounds[0], start + bounds[1]
+
+    def next_job(self):
+        """Ingest queued audio and return the next window to recognize, if one is due"""
+        with self._lock:
+            if not self.is_active:
+                return None
+            self._ingest_audio()
+
+            # Audio the ring buffer overwrote before a worker was free to take it
+            if self.last_processed_position < self.audio_buffer.start_position:
+                self.skipped_samples += self.audio_buffer.start_position - self.last_processed_position
+                self.last_processed_position = self.audio_buffer.start_position
+            # The queue policy decides whether a decoded backlog is caught up on or skipped
+            self.last_processed_position = self.audio_queue.backlog_start(
+                self.last_processed_position, self.audio_buffer.write_position, self.max_samples_for_processing)
+
+            # Sliding window processing logic for continuous coverage
+            current_time = time.time()
+            time_since_last = current_time - self.last_transcription_time
+            new_samples = self.audio_buffer.write_position - self.last_processed_position
+            if new_samples <= 0:
+                return None
+
+            # Sliding window approach - process overlapping segments once enough
+            # new audio arrived, or on a timer to handle slow input
+            if len(self.audio_buffer) >= self.window_samples and (
+                    new_samples >= self.slide_samples or time_since_last >= self.processing_interval):
+                min_length = self.window_samples
+            # Flush accumulated audio once the speaker pauses
+            elif (len(self.audio_buffer) >= self.min_samples_for_processing and
+                    time_since_last >= self.silence_threshold):
+                min_length = self.min_samples_for_processing
+            else:
+                return None
+
+            # A backlog is worked off in successive catch-up windows, oldest first
+            end_pos = min(self.audio_buffer.write_position, self._catch_up_end())
+            start_pos = self._window_start(end_pos, min_length)
+            speech = self._speech_window(start_pos, end_pos)
+            self.last_processed_position = end_pos
+            self.last_transcription_time = current_time
+
+            if speech is None:
+                logger.debug("No voice activity in window, skipping recognition")
+                # The speaker paused: finalize the partial once earlier windows are emitted
+                if self._partial_open:
+                    self._partial_open = False
+                    self._completions.finish(self._completions.take(), self._FINALIZE)
+                return None
+
+            self._partial_open = True
+            return functools.partial(self._transcribe_window, self._completions.take(), *speech)
+
+    def _emit_result(self, finished):
+        """Emit one window result, or a finalize marker, in window order (lock held)"""
+        if finished is self._FINALIZE:
+            self._emit_delta(self.result.finalize())
+        elif finished is not None:
+            self._emit_transcription(*finished)
+
+    def _recognize_pcm(self, samples):
+        """Recognize decoded PCM samples and apply phrase corrections"""
+        text, confidence = recognizer_backend.recognize_window(samples, self.decoder.sample_rate, 'lo-LA')
+
+        # Apply phrase dictionary if enabled
+        if self.use_phrases and text and hasattr(phrase_dict, 'correct_text'):
+            corrected_text, _ = phrase_dict.correct_text(str(text))
+            if corrected_text != text:
+                text = corrected_text
+                confidence += 0.1  # Boost confidence for corrected text
+
+        return text, confidence
+
+    def _transcribe_window(self, seq, window_audio, start_pos, end_pos):
+        """Recognize one window on a scheduler worker and emit results in window order"""
+        result = None
         try:
-            # Need minimum chunks for reliable transcription
-            if len(self.audio_buffer) < self.min_chunks_for_processing:
-                return
-
-            # Create overlapping audio segment
-            buffer_list = list(self.audio_buffer)
-            combined_audio = b''.join(buffer_list)
-
-            # Create temporary WebM file (since chunks are WebM format)
-            with tempfile.NamedTemporaryFile(suffix='.webm', delete=False) as temp_file:
-                temp_file.write(combined_audio)
-                temp_path = temp_file.name
-
-            try:
-                # Convert WebM to AudioSegment
-                audio_segment = AudioSegment.from_file(temp_path, format='webm')
-
-                # Export as WAV for speech recognition
-                with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as wav_file:
-                    wav_path = wav_file.name
-                    audio_segment.export(wav_path, format='wav')
-
-                # Transcribe
-                with sr.AudioFile(wav_path) as source:
-                    audio = self.recognizer.record(source)
-
-                    try:
-                        # Try Google Speech Recognition first
-                        text = self.recognizer.recognize_google(audio, language='lo-LA')
-                        confidence = 0.85  # Estimated confidence for Google API
-
-                        # Apply phrase dictionary if enabled
-                        if self.use_phrases and text and hasattr(phrase_dict, 'correct_text'):
-                            corrected_text = phrase_dict.correct_text(str(text))
-                            if corrected_text != text:
-                                text = corrected_text
-                                confidence += 0.1  # Boost confidence for corrected text
-
-                        # Check for duplicates before emitting
-                        if self._is_duplicate_text(text):
-                            logger.debug(f"Duplicate text detected, skipping: {text}")
-                        else:
-                            # Add to transcription history
-                            self.transcription_history.append({
-                                'text': text,
-                                'timestamp': time.time(),
-                                'chunk_id': self.chunk_counter
-                            })
-
-                            # Emit transcription result
-                            socketio.emit('transcription_chunk', {
-                                'text': text,
-                                'confidence': min(confidence, 1.0),
-                                'chunk_id': self.chunk_counter,
-                                'session_id': self.session_id,
-                                'is_final': False
-                            })
-
-                        # Smart buffer management - keep overlap chunks
-                        chunks_to_remove = max(1, len(self.audio_buffer) - self.overlap_chunks)
-                        for _ in range(chunks_to_remove):
-                            if self.audio_buffer:
-                                self.audio_buffer.popleft()
-
-                    except sr.UnknownValueError:
-                        # No speech detected in this chunk
-                        logger.debug("No speech detected in audio chunk")
-                        # Remove some old chunks but keep recent ones for context
-                        if len(self.audio_buffer) > self.max_chunks_for_processing:
-                            chunks_to_remove = len(self.audio_buffer) - self.overlap_chunks
-                            for _ in range(chunks_to_remove):
-                                if self.audio_buffer:
-                                    self.audio_buffer.popleft()
-                    except sr.RequestError as e:
-                        logger.error(f"Speech recognition request error: {str(e)}")
-
-                # Clean up temporary files
-                os.unlink(temp_path)
-                os.unlink(wav_path)
-
-            except Exception as e:
-                logger.error(f"Error processing audio chunk: {str(e)}")
-                if os.path.exists(temp_path):
-                    os.unlink(temp_path)
-
+            text, confidence = self._recognize_pcm(window_audio)
+            result = (text, confidence, start_pos, end_pos)
+        except NoSpeechError:
+            # No speech detected in this window
+            logger.debug("No speech detected in audio window")
+        except RecognitionError as e:
+            logger.error(f"Speech recognition request error: {str(e)}")
         except Exception as e:
-            logger.error(f"Error in chunk transcription: {str(e)}")
+            logger.error(f"Error in streaming transcription: {str(e)}")
+            socketio.emit('transcription_error', {
+                'error': str(e),
+                'session_id': self.session_id
+            }, to=self.owner_sid)
+
+        with self._lock:
+            self._completions.finish(seq, result)
+
+    def _emit_transcription(self, text, confidence, start_pos, end_pos):
+        """Fold a window hypothesis into the result and send what changed"""
+        # Only windows that share audio with the previous one can repeat its text
+        overlaps = start_pos < self.last_emitted_end
+        self.last_emitted_end = max(self.last_emitted_end, end_pos)
+        self.last_confidence = min(confidence, 1.0)
+        delta = self.result.update(text, overlaps=overlaps)
+        if delta is None:
+            logger.debug(f"Window repeats committed text, skipping: {text}")
+            return
+        self._emit_delta(delta, start_pos)
 
-    def _transcribe_sliding_window(self):
-        """Transcribe using sliding window approach for better coverage"""
+    def _emit_delta(self, delta, window_position=None):
+        """Send a result delta: text to append to the final transcript and the new partial
+
+        'text' carries the newly finalized text so clients that ignore
+        partials still build the same transcript.
+        """
+        if delta is None:
+            return
+        socketio.emit('transcription_chunk', dict(delta, **{
+            'text': delta['final'],
+            'confidence': self.last_confidence,
+            'chunk_id': self.chunk_counter,
+            'session_id': self.session_id,
+            'is_final': not delta['partial'],
+            'window_position': window_position if window_position is not None else self.last_emitted_end
+        }), to=self.owner_sid)
+
+    def _assess_audio_quality(self, samples):
+        """Assess decoded audio to detect clipping or speech buried in noise"""
         try:
-            buffer_size = len(self.audio_buffer)
-            if buffer_size < self.window_size:
+            energy_db, _ = self.vad.frame_features(samples)
+            if len(energy_db) == 0:
                 return
+            noise_floor = self.vad.update_noise_floor(samples, energy_db)
 
-            # Calculate window position
-            start_pos = max(0, buffer_size - self.window_size)
-            end_pos = buffer_size
-
-            # Extract window of audio chunks
-            buffer_list = list(self.audio_buffer)
-            window_chunks = buffer_list[start_pos:end_pos]
-            combined_audio = b''.join(window_chunks)
+            clipped_ratio = np.count_nonzero(np.abs(samples.astype(np.int32)) >= 32000) / len(samples)
+            speech_level = float(np.max(energy_db))
+            has_speech = speech_level > max(noise_floor + self.vad.energy_margin_db, self.vad.min_energy_db)
 
-            # Create temporary WebM file
-            with tempfile.NamedTemporaryFile(suffix='.webm', delete=False) as temp_file:
-                temp_file.write(combined_audio)
-                temp_path = temp_file.name
-
-            try:
-                # Convert WebM to AudioSegment
-                audio_segment = AudioSegment.from_file(temp_path, format='webm')
-
-                # Export as WAV for speech recognition
-                with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as wav_file:
-                    wav_path = wav_file.name
-                    audio_segment.export(wav_path, format='wav')
-
-                # Transcribe
-                with sr.AudioFile(wav_path) as source:
-                    audio = self.recognizer.record(source)
-
-                    try:
-                        # Try Google Speech Recognition
-                        text = self.recognizer.recognize_google(audio, language='lo-LA')
-                        confidence = 0.85
-
-                        # Apply phrase dictionary if enabled
-                        if self.use_phrases and text and hasattr(phrase_dict, 'correct_text'):
-                            corrected_text = phrase_dict.correct_text(str(text))
-                            if corrected_text != text:
-                                text = corrected_text
-                                confidence += 0.1
-
-                        # Check for duplicates before emitting
-                        if not self._is_duplicate_text(text):
-                            # Add to transcription history
-                            self.transcription_history.append({
-                                'text': text,
-                                'timestamp': time.time(),
-                                'chunk_id': self.chunk_counter,
-                                'window_pos': start_pos
-                            })
-
-                            # Emit transcription result
-                            socketio.emit('transcription_chunk', {
-                                'text': text,
-                                'confidence': min(confidence, 1.0),
-                                'chunk_id': self.chunk_counter,
-                                'session_id': self.session_id,
-                                'is_final': False,
-                                'window_position': start_pos
-                            })
-
-                        # Update last processed position
-                        self.last_processed_position = end_pos - self.overlap_chunks
-
-                    except sr.UnknownValueError:
-                        # No speech detected in this window
-                        logger.debug("No speech detected in sliding window")
-                        # Still update position to keep sliding
-                        self.last_processed_position = end_pos - self.overlap_chunks
-                    except sr.RequestError as e:
-                        logger.error(f"Speech recognition request error: {str(e)}")
-
-                # Clean up temporary files
-                os.unlink(temp_path)
-                os.unlink(wav_path)
-
-            except Exception as e:
-                logger.error(f"Error processing sliding window: {str(e)}")
-                if os.path.exists(temp_path):
-                    os.unlink(temp_path)
-
-        except Exception as e:
-            logger.error(f"Error in sliding window transcription: {str(e)}")
-
-    def _assess_audio_quality(self, audio_data):
-        """Assess audio quality to detect poor conditions"""
-        try:
-            # Simple quality assessment based on audio data size and content
-            if len(audio_data) < 1000:  # Very small chunk
+            if clipped_ratio > 0.01:  # Input is clipping
                 quality_score = 0.3
-            elif len(audio_data) > 50000:  # Very large chunk
-                quality_score = 0.7
+            elif has_speech and speech_level - noise_floor < 15:  # Speech barely above noise
+                quality_score = 0.4
             else:
                 quality_score = 0.8
 
@@ -540,81 +545,46 @@ class StreamingTranscriber:
                 socketio.emit('audio_quality_warning', {
                     'session_id': self.session_id,
                     'message': 'Poor audio quality detected. Consider adjusting microphone or reducing background noise.'
-                })
+                }, to=self.owner_sid)
                 self.low_quality_count = 0  # Reset to avoid spam
 
         except Exception as e:
             logger.debug(f"Error assessing audio quality: {e}")
 
-    def _is_duplicate_text(self, text):
-        """Enhanced duplicate detection for sliding window approach"""
-        if not text or not text.strip():
-            return True
-
-        text_clean = text.strip().lower()
-
-        # Skip very short text that's likely noise
-        if len(text_clean) < 3:
-            return True
-
-        # Check against recent transcriptions with time-based filtering
-        current_time = time.time()
-
-        for recent in self.transcription_history:
-            recent_clean = recent['text'].strip().lower()
-            time_diff = current_time - recent['timestamp']
-
-            # Skip very old transcriptions (older than 10 seconds)
-            if time_diff > 10:
-                continue
-
-            # Exact match
-            if text_clean == recent_clean:
-                return True
-
-            # Substring check with length consideration
-            if len(text_clean) > 5 and len(recent_clean) > 5:
-                # Check if one is completely contained in the other
-                if text_clean in recent_clean or recent_clean in text_clean:
-                    return True
-
-            # Similar text with high overlap (stricter for recent transcriptions)
-            similarity_threshold = 0.9 if time_diff < 2 else 0.8
-            if self._calculate_text_similarity(text_clean, recent_clean) > similarity_threshold:
-                return True
-
-            # Check for partial word overlap (common in sliding windows)
-            words_new = set(text_clean.split())
-            words_recent = set(recent_clean.split())
-            if words_new and words_recent:
-                overlap_ratio = len(words_new.intersection(words_recent)) / len(words_new.union(words_recent))
-                if overlap_ratio > 0.85 and time_diff < 3:  # High overlap in recent time
-                    return True
-
-        return False
-
-    def _calculate_text_similarity(self, text1, text2):
-        """Calculate similarity between two text strings"""
-        if not text1 or not text2:
-            return 0.0
-
-        # Simple word-based similarity
-        words1 = set(text1.split())
-        words2 = set(text2.split())
-
-        if not words1 or not words2:
-            return 0.0
-
-        intersection = words1.intersection(words2)
-        union = words1.union(words2)
+    def stop(self):
+        """Stop the streaming transcriber and finalize the partial result
+
+        Windows still being recognized are emitted first; the final delta
+        follows them, and nothing is emitted after it.
+        """
+        recognition_scheduler.unregister(self.session_id)
+        with self._lock:
+            self.is_active = False
+            self._completions.close(self._FINALIZE)
+        self.decoder.close()
+
+def end_streaming_session(session_id, ended_at=None):
+    """Stop a streaming session, record its usage and drop it from every index
+
+    Returns (minutes_used, total_usage), or None if no usage was recorded.
+    """
+    transcriber = streaming_sessions.pop(session_id, None)
+    start_time = session_start_times.pop(session_id, None)
+    if transcriber is None:
+        return None
 
-        return len(intersection) / len(union) if union else 0.0
+    transcriber.stop()
+    owned = session_owners.get(transcriber.owner_sid)
+    if owned is not None:
+        owned.discard(session_id)
+        if not owned:
+            del session_owners[transcriber.owner_sid]
 
-    def stop(self):
-        """Stop the streaming transcriber"""
-        self.is_active = False
-        if self.processing_thread.is_alive():
-            self.processing_thread.join(timeout=2.0)
+    if start_time is None or transcriber.user_id is None:
+        return None
+    duration = ((ended_at or datetime.now()) - start_time).total_seconds() / 60  # Convert to minutes
+    minutes_used = max(1, round(duration))  # Minimum 1 minute
+    return minutes_used, add_usage(transcriber.user_id, minutes_used)
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -634,6 +604,12 @@ def add_security_headers(response):
     response.headers['Content-Security-Policy'] = csp
     return response
 
+@app.before_request
+def start_background_workers():
+    """Start this process's job workers and janitor on its first request (after any fork)"""
+    job_pool.start()
+    janitor.start()
+
 @app.after_request
 def after_request(response):
     return add_security_headers(response)
@@ -749,30 +725,34 @@ def handle_recording():
         file_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{job_id}.wav")
         audio_file.save(file_path)
         
-        # Get transcription options
-        show_alternatives = request.form.get('alternatives') == 'on'
-        use_calibration = request.form.get('use_calibration') == 'on'
-        use_phrases = request.form.get('use_phrases') == 'on'
-        
-        # Update status
-        processing_status[job_id] = {
-            'status': 'processing',
-            'progress': 0,
-            'start_time': datetime.now().isoformat(),
-            'options': {
-                'show_alternatives': show_alternatives,
-                'use_calibration': use_calibration,
-                'use_phrases': use_phrases
-            }
+        options = {
+            'show_alternatives': request.form.get('alternatives') == 'on',
+            'use_calibration': request.form.get('use_calibration') == 'on',
+            'use_phrases': request.form.get('use_phrases') == 'on'
+        }
+        payload = {
+            'file_path': file_path,
+            'options': options,
+            'cache_key': transcription_cache_key(file_path, options['use_calibration'])
         }
         
-        # Start processing in background
-        thread = threading.Thread(
-            target=process_audio_async,
-            args=(file_path, job_id, show_alternatives, use_calibration, use_phrases)
-        )
-        thread.daemon = True  # Ensure thread doesn't block application exit
-        thread.start()
+        # The same recording was recognized before: finish right away
+        cached = result_cache.get(payload['cache_key']) if payload['cache_key'] else None
+        if cached is not None:
+            # Should completing it fail, the lease runs out and a worker redoes the job
+            job_store.create(payload, job_id=job_id, status=PROCESSING,
+                             lease_seconds=app.config['JOB_LEASE_SECONDS'])
+            complete_transcription_job(job_id, cached, options)
+            remove_job_upload(job_store.get(job_id))
+            return jsonify({
+                'job_id': job_id,
+                'status': 'completed',
+                'cached': True,
+                'message': 'Transcription loaded from cache'
+            })
+        
+        # Queue the job; the upload is kept until the job finally completes or fails
+        job_pool.submit(payload, job_id=job_id)
         
         return jsonify({
             'job_id': job_id,
@@ -787,138 +767,182 @@ def handle_recording():
             'details': str(e)
         }), 500
 
-def process_audio_async(file_path, job_id, show_alternatives=False, use_calibration=False, use_phrases=False):
-    """Process audio file asynchronously"""
-    start_time = datetime.now()
+def process_transcription_job(job):
+    """Transcribe one queued upload on a job worker
+
+    Raises JobFailed when the audio has no usable speech; any other error
+    is retried by the worker pool.
+    """
+    job_id = job['id']
+    file_path = job['payload']['file_path']
+    options = job['payload']['options']
+    use_calibration = options.get('use_calibration', False)
     
-    try:
-        processing_status[job_id].update({
-            'status': 'processing',
-            'progress': 10,
-            'message': 'Loading audio file'
-        })
-        
-        # Apply calibration if requested
-        if use_calibration:
-            processing_status[job_id].update({
-                'progress': 20,
-                'message': 'Applying audio calibration'
-            })
-            # Process audio with calibration settings
-            # (This will be implemented in transcribe_audio_final)
-        
-        # Transcribe audio
-        result = transcribe_audio_final(
+    job_store.update(job_id, progress=10, message='Loading audio file')
+    
+    # Apply calibration if requested
+    if use_calibration:
+        job_store.update(job_id, progress=20, message='Applying audio calibration')
+    
+    # Transcribe audio; the raw result is cached, corrections are applied per request
+    cache_key = job['payload'].get('cache_key')
+    raw_result = result_cache.get(cache_key) if cache_key else None
+    if raw_result is None:
+        raw_result = transcribe_audio_final(
             file_path,
-            show_alternatives=show_alternatives,
+            show_alternatives=True,
             calibrator=calibrator if use_calibration else None,
-            phrase_dict=phrase_dict if use_phrases else None
+            backend=batch_recognizer_backend,
+            max_segment_seconds=app.config['TRANSCRIBE_SEGMENT_SECONDS'],
+            max_workers=app.config['TRANSCRIBE_PARALLELISM'],
+            block_seconds=app.config['PREPROCESS_BLOCK_SECONDS'] or None,
+            raise_errors=True
         )
         
-        if result:
-            processing_status[job_id].update({
-                'progress': 50,
-                'message': 'Transcription completed, formatting results'
-            })
+        if not raw_result:
+            raise JobFailed('No transcription results', 'Audio might be silent or unclear')
+        if cache_key:
+            result_cache.put(cache_key, raw_result)
+    
+    job_store.update(job_id, progress=50, message='Transcription completed, formatting results')
+    complete_transcription_job(job_id, raw_result, options)
+
+def complete_transcription_job(job_id, raw_result, options):
+    """Apply the job's options to a raw result, save the transcript and mark the job done"""
+    show_alternatives = options.get('show_alternatives', False)
+    use_calibration = options.get('use_calibration', False)
+    use_phrases = options.get('use_phrases', False)
+    result = finalize_result(raw_result, show_alternatives, phrase_dict if use_phrases else None)
+    
+    # Save results
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    result_filename = f"transcript_{job_id}_{timestamp}.txt"
+    result_path = os.path.join(app.config['RESULTS_FOLDER'], result_filename)
+    
+    with open(result_path, 'w', encoding='utf-8') as f:
+        f.write("Speech Transcription Result\n")
+        f.write("=" * 50 + "\n\n")
+        f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+        f.write(f"Average Confidence: {result['average_confidence']:.1%}\n\n")
+        
+        if use_calibration:
+            f.write("Audio Processing:\n")
+            f.write("- Microphone calibration applied\n")
+            f.write("- Noise reduction enabled\n\n")
+        
+        if use_phrases:
+            f.write("Text Processing:\n")
+            f.write("- Phrase dictionary corrections applied\n")
+            f.write("- Speech adaptation enabled\n\n")
+        
+        f.write("TRANSCRIPTION:\n")
+        f.write("-" * 20 + "\n")
+        f.write(f"{result['final_text']}\n\n")
+        
+        # Quality indicator
+        if result['average_confidence'] >= 0.9:
+            quality = "Excellent (≥90%)"
+        elif result['average_confidence'] >= 0.8:
+            quality = "Very Good (≥80%)"
+        elif result['average_confidence'] >= 0.7:
+            quality = "Good (≥70%)"
+        elif result['average_confidence'] >= 0.6:
+            quality = "Fair (≥60%) - May need review"
+        else:
+            quality = "Poor (<60%) - Needs verification"
+        f.write(f"Quality: {quality}\n")
+        
+        # Add alternatives if requested
+        if show_alternatives and result.get('all_alternatives'):
+            job_store.update(job_id, progress=75, message='Adding alternative transcriptions')
             
-            # Save results
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            result_filename = f"transcript_{job_id}_{timestamp}.txt"
-            result_path = os.path.join(app.config['RESULTS_FOLDER'], result_filename)
+            f.write("\n" + "=" * 50 + "\n")
+            f.write("DETAILED BREAKDOWN:\n")
+            f.write("=" * 50 + "\n\n")
             
-            with open(result_path, 'w', encoding='utf-8') as f:
-                f.write("Speech Transcription Result\n")
-                f.write("=" * 50 + "\n\n")
-                f.write(f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"Average Confidence: {result['average_confidence']:.1%}\n\n")
-                
-                if use_calibration:
-                    f.write("Audio Processing:\n")
-                    f.write("- Microphone calibration applied\n")
-                    f.write("- Noise reduction enabled\n\n")
-                
-                if use_phrases:
-                    f.write("Text Processing:\n")
-                    f.write("- Phrase dictionary corrections applied\n")
-                    f.write("- Speech adaptation enabled\n\n")
-                
-                f.write("TRANSCRIPTION:\n")
-                f.write("-" * 20 + "\n")
-                f.write(f"{result['final_text']}\n\n")
-                
-                # Quality indicator
-                if result['average_confidence'] >= 0.9:
-                    quality = "Excellent (≥90%)"
-                elif result['average_confidence'] >= 0.8:
-                    quality = "Very Good (≥80%)"
-                elif result['average_confidence'] >= 0.7:
-                    quality = "Good (≥70%)"
-                elif result['average_confidence'] >= 0.6:
-                    quality = "Fair (≥60%) - May need review"
-                else:
-                    quality = "Poor (<60%) - Needs verification"
-                f.write(f"Quality: {quality}\n")
+            for i, segment in enumerate(result['segments'], 1):
+                f.write(f"Segment {i} [{segment['start_time']:.1f}s - {segment['end_time']:.1f}s]:\n")
+                f.write(f"Text: {segment['text']}\n")
+                f.write(f"Confidence: {segment['confidence']:.1%}\n")
                 
-                # Add alternatives if requested
-                if show_alternatives and result.get('all_alternatives'):
-                    processing_status[job_id].update({
-                        'progress': 75,
-                        'message': 'Adding alternative transcriptions'
-                    })
-                    
-                    f.write("\n" + "=" * 50 + "\n")
-                    f.write("DETAILED BREAKDOWN:\n")
-                    f.write("=" * 50 + "\n\n")
-                    
-                    for i, segment in enumerate(result['segments'], 1):
-                        f.write(f"Segment {i}:\n")
-                        f.write(f"Text: {segment['text']}\n")
-                        f.write(f"Confidence: {segment['confidence']:.1%}\n")
-                        
-                        if result['all_alternatives'] and i <= len(result['all_alternatives']):
-                            alternatives = result['all_alternatives'][i-1]
-                            if len(alternatives) > 1:
-                                f.write("Alternatives:\n")
-                                for j, alt in enumerate(alternatives[1:], 2):
-                                    f.write(f"  {j}. {alt['text']} ({alt['confidence']:.1%})\n")
-                        f.write("\n")
-            
-            completion_time = datetime.now()
-            processing_duration = (completion_time - start_time).total_seconds()
-            
-            processing_status[job_id].update({
-                'status': 'completed',
-                'progress': 100,
-                'result': result,
-                'file_path': result_path,
-                'filename': result_filename,
-                'completion_time': completion_time.isoformat(),
-                'processing_duration': processing_duration,
-                'message': 'Transcription completed successfully'
-            })
-        else:
-            processing_status[job_id].update({
-                'status': 'error',
-                'error': 'No transcription results',
-                'error_details': 'Audio might be silent or unclear',
-                'completion_time': datetime.now().isoformat()
-            })
+                if result['all_alternatives'] and i <= len(result['all_alternatives']):
+                    alternatives = result['all_alternatives'][i-1]
+                    if len(alternatives) > 1:
+                        f.write("Alternatives:\n")
+                        for j, alt in enumerate(alternatives[1:], 2):
+                            f.write(f"  {j}. {alt['text']} ({alt['confidence']:.1%})\n")
+                f.write("\n")
     
+    job_store.update(
+        job_id,
+        status=COMPLETED,
+        progress=100,
+        result=result,
+        result_path=result_path,
+        result_filename=result_filename,
+        completed_at=time.time(),
+        lease_expires=None,
+        message='Transcription completed successfully'
+    )
+
+def transcription_cache_key(file_path, use_calibration):
+    """Result cache key: the decoded audio plus everything that changes recognizer output"""
+    try:
+        content_hash = wav_content_hash(file_path)
+    except (wave.Error, EOFError, OSError) as e:
+        logger.debug(f"Not caching {file_path}: {e}")
+        return None
+    return ResultCache.key(
+        content_hash,
+        kind='transcription',
+        backend=batch_recognizer_backend.name,
+        language='lo-LA',
+        segment_seconds=app.config['TRANSCRIBE_SEGMENT_SECONDS'],
+        block_seconds=app.config['PREPROCESS_BLOCK_SECONDS'],
+        calibration=calibrator.settings if use_calibration else None
+    )
+
+def remove_job_upload(job):
+    """Delete the uploaded audio once its job has finally completed or failed"""
+    try:
+        os.remove(job['payload']['file_path'])
     except Exception as e:
-        logger.error(f"Error processing audio for job {job_id}: {str(e)}")
-        processing_status[job_id].update({
-            'status': 'error',
-            'error': str(e),
-            'error_details': f"Error type: {type(e).__name__}",
-            'completion_time': datetime.now().isoformat()
-        })
-    
-    finally:
-        # Clean up uploaded file
-        try:
-            os.remove(file_path)
-        except Exception as e:
-            logger.warning(f"Failed to remove temporary file {file_path}: {str(e)}")
+        logger.warning(f"Failed to remove temporary file {job['payload']['file_path']}: {str(e)}")
+
+# Recognized results by audio content, shared by every server process
+result_cache = ResultCache(
+    app.config['RESULT_CACHE_DIR'],
+    ttl_seconds=app.config['RESULT_CACHE_TTL_HOURS'] * 3600,
+    max_entries=app.config['RESULT_CACHE_MAX_ENTRIES'],
+    max_bytes=app.config['RESULT_CACHE_MAX_MB'] * 1024 * 1024
+)
+
+def job_room(job_id):
+    return f'job_{job_id}'
+
+# Wakes /status long-polls when a job handled by this process changes
+job_updates = threading.Condition()
+
+def publish_job_update(job_id):
+    """Push a job's new status to its subscribers and wake waiting long-polls"""
+    job = job_store.get(job_id)
+    if job is None:
+        return
+    socketio.emit('job_progress', dict(job_status_payload(job)[0], job_id=job_id), to=job_room(job_id))
+    with job_updates:
+        job_updates.notify_all()
+
+# Durable job queue, shared by every server process using the same database
+job_store = JobStore(app.config['JOB_DB_PATH'], on_change=publish_job_update)
+job_pool = JobWorkerPool(
+    job_store,
+    process_transcription_job,
+    num_workers=app.config['JOB_WORKERS'],
+    max_attempts=app.config['JOB_MAX_ATTEMPTS'],
+    lease_seconds=app.config['JOB_LEASE_SECONDS'],
+    retry_delay=app.config['JOB_RETRY_DELAY'],
+    cleanup=remove_job_upload
+)
 
 @app.route('/')
 def index():
@@ -1179,49 +1203,28 @@ def upload_audio():
             logger.error('No selected file')
             return jsonify({'status': 'error', 'error': 'No selected file'})
         
-        # Save the uploaded webm file
-        webm_filename = secure_filename(audio_file.filename)
-        webm_path = os.path.join(app.config['UPLOAD_FOLDER'], webm_filename)
-        audio_file.save(webm_path)
-        logger.info(f'Saved webm file to {webm_path}')
-        
-        try:
-            # Convert webm to wav using pydub
-            audio = AudioSegment.from_file(webm_path)
-            
-            # Create a temporary WAV file
-            with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_wav:
-                wav_path = temp_wav.name
-                audio.export(wav_path, format='wav')
-                logger.info(f'Converted to WAV: {wav_path}')
-            
-            # Initialize recognizer
-            r = sr.Recognizer()
-            
-            # Convert audio to text
-            with sr.AudioFile(wav_path) as source:
-                audio_data = r.record(source)
-                text = r.recognize_google(audio_data, language='lo-LA')
-                logger.info('Successfully transcribed audio')
-            
-            # Clean up temporary files
-            os.remove(webm_path)
-            os.remove(wav_path)
-            
-            return jsonify({
-                'status': 'success',
-                'text': text
-            })
-            
-        except Exception as e:
-            logger.error(f'Error processing audio: {str(e)}')
-            # Clean up files in case of error
-            if os.path.exists(webm_path):
-                os.remove(webm_path)
-            if 'wav_path' in locals() and os.path.exists(wav_path):
-                os.remove(wav_path)
-            raise
-        
+        # Decode the upload straight from memory - nothing touches the disk
+        audio_bytes = audio_file.read()
+        pcm = decode_audio(audio_bytes)
+        logger.info(f'Decoded {len(audio_bytes)} bytes of uploaded audio to {len(pcm)} bytes of PCM')
+
+        # Convert audio to text, unless this exact audio was recognized before
+        cache_key = ResultCache.key(ResultCache.hash_pcm(pcm), kind='upload',
+                                    backend=recognizer_backend.name, language='lo-LA')
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            text = cached['text']
+        else:
+            text, _ = recognizer_backend.recognize_window(pcm, TARGET_SAMPLE_RATE, 'lo-LA')
+            result_cache.put(cache_key, {'text': text})
+        logger.info('Successfully transcribed audio')
+
+        return jsonify({
+            'status': 'success',
+            'text': text,
+            'cached': cached is not None
+        })
+
     except Exception as e:
         logger.error(f'Error in upload_audio: {str(e)}')
         return jsonify({
@@ -1229,55 +1232,146 @@ def upload_audio():
             'error': str(e)
         })
 
-@app.route('/status/<job_id>')
-def get_status(job_id):
-    """Get the status of a transcription job"""
-    if job_id not in processing_status:
-        return jsonify({
-            'status': 'not_found',
-            'error': 'Job not found',
-            'details': 'The specified job ID does not exist'
-        }), 404
-    
-    status = processing_status[job_id]
+@app.route('/metrics')
+def metrics():
+    """Queue depth and worker metrics for monitoring"""
+    return jsonify({
+        'streaming': recognition_scheduler.stats(),
+        'speech_clients': get_client_pool(app.config['SPEECH_CLIENT_POOL_SIZE']).stats(),
+        'jobs': job_pool.stats(),
+        'result_cache': result_cache.stats(),
+        'janitor': janitor.stats()
+    })
+
+def sweep_idle_streaming_sessions():
+    """End sessions that stopped sending audio and drop orphaned bookkeeping"""
+    cutoff = time.time() - app.config['STREAMING_IDLE_TIMEOUT']
+    removed = 0
+    for session_id, transcriber in list(streaming_sessions.items()):
+        if transcriber.last_activity < cutoff:
+            # Usage is charged up to the last audio, not for the idle time
+            usage = end_streaming_session(session_id, ended_at=datetime.fromtimestamp(transcriber.last_activity))
+            stopped = {
+                'session_id': session_id,
+                'status': 'stopped',
+                'message': 'Streaming session ended after inactivity'
+            }
+            if usage is not None:
+                stopped['minutes_used'], stopped['total_usage'] = usage
+            socketio.emit('streaming_stopped', stopped, to=transcriber.owner_sid)
+            removed += 1
     
-    if status['status'] == 'completed':
-        result = status['result']
-        return jsonify({
+    # Start times and owner entries whose session is gone (e.g. a failed start)
+    for session_id in list(session_start_times):
+        if session_id not in streaming_sessions:
+            session_start_times.pop(session_id, None)
+            removed += 1
+    for sid, owned in list(session_owners.items()):
+        owned.intersection_update(streaming_sessions)
+        if not owned:
+            session_owners.pop(sid, None)
+    return removed
+
+janitor = Janitor(interval=app.config['JANITOR_INTERVAL'])
+janitor.add(
+    'jobs',
+    lambda: job_store.prune(app.config['JOB_RETENTION_HOURS'] * 3600, app.config['JOB_MAX_FINISHED']),
+    job_store.counts
+)
+janitor.add(
+    'streaming_sessions',
+    sweep_idle_streaming_sessions,
+    lambda: {'sessions': len(streaming_sessions), 'start_times': len(session_start_times),
+             'owners': len(session_owners)}
+)
+janitor.add(
+    'results',
+    # Transcripts of jobs still in the store stay downloadable
+    lambda: prune_directory(app.config['RESULTS_FOLDER'], app.config['RESULTS_TTL_HOURS'] * 3600,
+                            app.config['RESULTS_MAX_FILES'], app.config['RESULTS_MAX_MB'] * 1024 * 1024,
+                            keep=job_store.result_paths()),
+    lambda: directory_size(app.config['RESULTS_FOLDER'])
+)
+janitor.add(
+    'exports',
+    lambda: prune_directory(tempfile.gettempdir(), app.config['EXPORT_TTL_MINUTES'] * 60, prefix=EXPORT_DIR_PREFIX),
+    lambda: directory_size(tempfile.gettempdir(), prefix=EXPORT_DIR_PREFIX)
+)
+janitor.add('result_cache', result_cache.evict)
+
+def job_status_payload(job):
+    """Status response body and HTTP code for a job"""
+    if job['status'] == COMPLETED:
+        result = job['result']
+        return {
             'status': 'completed',
+            'progress': job['progress'],
             'text': result['final_text'],
             'confidence': result['average_confidence'],
             'segments': result.get('segments', []),
             'alternatives': result.get('all_alternatives', []),
-            'download_url': f'/download/{job_id}',
-            'completion_time': status.get('completion_time'),
-            'processing_duration': status.get('processing_duration')
-        })
-    elif status['status'] == 'error':
-        return jsonify({
+            'download_url': f"/download/{job['id']}",
+            'completion_time': datetime.fromtimestamp(job['completed_at']).isoformat(),
+            'processing_duration': job['completed_at'] - job['started_at']
+        }, 200
+    elif job['status'] == ERROR:
+        return {
             'status': 'error',
-            'error': status.get('error', 'Unknown error'),
-            'details': status.get('error_details')
-        }), 500
+            'error': job.get('error') or 'Unknown error',
+            'details': job.get('error_details')
+        }, 500
     else:
-        # Processing status
-        current_time = datetime.now()
-        start_time = datetime.fromisoformat(status['start_time'])
-        processing_duration = (current_time - start_time).total_seconds()
+        # Queued or processing
+        processing_duration = time.time() - job['created_at']
         
-        return jsonify({
+        return {
             'status': 'processing',
-            'progress': status['progress'],
+            'state': job['status'],
+            'progress': job['progress'],
             'duration': processing_duration,
-            'message': 'Transcription in progress'
-        })
+            'attempts': job['attempts'],
+            'message': job.get('message') or 'Transcription in progress'
+        }, 200
+
+@app.route('/status/<job_id>')
+def get_status(job_id):
+    """Get the status of a transcription job
+
+    Responses carry the job version as ETag; a request whose If-None-Match
+    still matches gets 304. With ?wait=<seconds> such a request is held
+    until the job changes or the wait runs out (long-poll).
+    """
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({
+            'status': 'not_found',
+            'error': 'Job not found',
+            'details': 'The specified job ID does not exist'
+        }), 404
+    
+    wait = min(request.args.get('wait', 0, type=float), app.config['JOB_STATUS_MAX_WAIT'])
+    deadline = time.time() + wait
+    while (request.if_none_match.contains(str(job['version']))
+           and job['status'] not in (COMPLETED, ERROR) and time.time() < deadline):
+        # Other processes' updates only show up in the database, so re-check every second
+        with job_updates:
+            job_updates.wait(timeout=min(1.0, deadline - time.time()))
+        job = job_store.get(job_id)
+    
+    if request.if_none_match.contains(str(job['version'])):
+        response = make_response('', 304)
+    else:
+        payload, code = job_status_payload(job)
+        response = make_response(jsonify(payload), code)
+    response.set_etag(str(job['version']))
+    return response
 
 @app.route('/download/<job_id>')
 def download_file(job_id):
-    if job_id in processing_status and processing_status[job_id]['status'] == 'completed':
-        file_path = processing_status[job_id]['file_path']
-        filename = processing_status[job_id]['filename']
-        return send_file(file_path, as_attachment=True, download_name=filename)
+    job = job_store.get(job_id)
+    # The result file may have been removed by hand or by the janitor
+    if job is not None and job['status'] == COMPLETED and os.path.exists(job['result_path']):
+        return send_file(job['result_path'], as_attachment=True, download_name=job['result_filename'])
     return "File not found", 404
 
 @app.route('/save_transcript', methods=['POST'])
@@ -1344,7 +1438,7 @@ def export_transcript():
         text_content = h.handle(content)
         
         # Generate temporary file
-        temp_dir = tempfile.mkdtemp()
+        temp_dir = tempfile.mkdtemp(prefix=EXPORT_DIR_PREFIX)
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         
         if format == 'docx':
@@ -1472,14 +1566,17 @@ def handle_start_streaming(data):
         use_calibration = data.get('use_calibration', False)
         use_phrases = data.get('use_phrases', False)
 
-        # Create new streaming session
+        # Create new streaming session bound to this client's room (its sid)
         transcriber = StreamingTranscriber(
             session_id=session_id,
+            owner_sid=request.sid,
+            user_id=user_id,
             use_calibration=use_calibration,
             use_phrases=use_phrases
         )
 
         streaming_sessions[session_id] = transcriber
+        session_owners.setdefault(request.sid, set()).add(session_id)
         session_start_times[session_id] = datetime.now()  # Track start time
 
         emit('streaming_started', {
@@ -1505,7 +1602,8 @@ def handle_audio_chunk(data):
         session_id = data.get('session_id')
         audio_data = data.get('audio_data')
 
-        if not session_id or session_id not in streaming_sessions:
+        transcriber = streaming_sessions.get(session_id) if session_id else None
+        if transcriber is None or transcriber.owner_sid != request.sid:
             emit('streaming_error', {
                 'error': 'Invalid session',
                 'message': 'Session not found or expired'
@@ -1519,18 +1617,21 @@ def handle_audio_chunk(data):
             })
             return
 
-        # Decode base64 audio data
-        try:
-            decoded_audio = base64.b64decode(audio_data)
-        except Exception as e:
-            emit('streaming_error', {
-                'error': 'Invalid audio format',
-                'message': 'Failed to decode audio data'
-            })
-            return
+        if isinstance(audio_data, (bytes, bytearray, memoryview)):
+            # Binary Socket.IO attachment - hand the bytes to the decoder as-is
+            decoded_audio = audio_data
+        else:
+            # Fallback for clients that still send base64 text
+            try:
+                decoded_audio = base64.b64decode(audio_data)
+            except Exception as e:
+                emit('streaming_error', {
+                    'error': 'Invalid audio format',
+                    'message': 'Failed to decode audio data'
+                })
+                return
 
         # Add to transcriber queue
-        transcriber = streaming_sessions[session_id]
         transcriber.add_audio_chunk(decoded_audio)
 
     except Exception as e:
@@ -1545,25 +1646,13 @@ def handle_stop_streaming(data):
     """Stop streaming transcription session"""
     try:
         session_id = data.get('session_id')
-        user_id = get_user_id()
-
-        if session_id and session_id in streaming_sessions:
-            transcriber = streaming_sessions[session_id]
-            transcriber.stop()
-            del streaming_sessions[session_id]
 
-            # Calculate usage time
-            if session_id in session_start_times:
-                start_time = session_start_times[session_id]
-                end_time = datetime.now()
-                duration = (end_time - start_time).total_seconds() / 60  # Convert to minutes
-
-                # Add usage (minimum 1 minute)
-                minutes_used = max(1, round(duration))
-                updated_usage = add_usage(user_id, minutes_used)
-
-                del session_start_times[session_id]
+        transcriber = streaming_sessions.get(session_id) if session_id else None
+        if transcriber is not None and transcriber.owner_sid == request.sid:
+            usage = end_streaming_session(session_id)
 
+            if usage is not None:
+                minutes_used, updated_usage = usage
                 emit('streaming_stopped', {
                     'session_id': session_id,
                     'status': 'stopped',
@@ -1594,6 +1683,25 @@ def handle_stop_streaming(data):
             'message': 'Failed to stop streaming session'
         })
 
+@socketio.on('subscribe_job')
+def handle_subscribe_job(data):
+    """Receive job_progress events for an upload instead of polling /status"""
+    job_id = (data or {}).get('job_id')
+    job = job_store.get(job_id) if job_id else None
+    if job is None:
+        emit('job_progress', {'job_id': job_id, 'status': 'not_found', 'error': 'Job not found'})
+        return
+    
+    join_room(job_room(job_id))
+    # Send the current state, in case the job moved on before the client subscribed
+    emit('job_progress', dict(job_status_payload(job)[0], job_id=job_id))
+
+@socketio.on('unsubscribe_job')
+def handle_unsubscribe_job(data):
+    job_id = (data or {}).get('job_id')
+    if job_id:
+        leave_room(job_room(job_id))
+
 @socketio.on('connect')
 def handle_connect():
     """Handle client connection"""
@@ -1605,18 +1713,10 @@ def handle_disconnect():
     """Handle client disconnection"""
     logger.info(f"Client disconnected: {request.sid}")
 
-    # Clean up any streaming sessions for this client
-    sessions_to_remove = []
-    for session_id, transcriber in streaming_sessions.items():
-        # Note: In a production app, you'd want to track which sessions belong to which clients
-        # For now, we'll clean up sessions that have been inactive
-        if not transcriber.is_active:
-            sessions_to_remove.append(session_id)
-
-    for session_id in sessions_to_remove:
-        if session_id in streaming_sessions:
-            streaming_sessions[session_id].stop()
-            del streaming_sessions[session_id]
+    # Clean up the streaming sessions this client started
+    for session_id in list(session_owners.get(request.sid, ())):
+        end_streaming_session(session_id)
+        logger.info(f"Ended streaming session {session_id} of disconnected client {request.sid}")
 
 if __name__ == '__main__':
     print("Server starting! Please access the application at: http://localhost:5050")